@@ -1,3 +1,5 @@
+from functools import lru_cache
+import math
 import numbers
 from pathlib import Path
 import platform
@@ -17,12 +19,13 @@ import serial.tools.list_ports
 from rcb4.asm import encode_servo_ids_to_5bytes_bin
 from rcb4.asm import encode_servo_positions_to_bytes
 from rcb4.asm import encode_servo_velocity_and_position_to_bytes
-from rcb4.asm import four_bit_to_num
+from rcb4.asm import four_bit_to_num_vector
 from rcb4.asm import rcb4_checksum
 from rcb4.asm import rcb4_servo_svector
 from rcb4.asm import rcb4_velocity
 from rcb4.ctype_utils import c_type_to_numpy_format
 from rcb4.ctype_utils import c_type_to_size
+from rcb4.ctype_utils import c_type_to_struct_format
 from rcb4.data import kondoh7_elf
 from rcb4.rcb4interface import CommandTypes
 from rcb4.rcb4interface import deg_to_servovector
@@ -83,6 +86,13 @@ armh7_variable_list = [
 ]
 
 
+# A single MREADV reply carries at most this many bytes.
+mreadv_max_size = 250
+
+# Number of proximity and force channels of a jointbase sensor.
+jointbase_sensor_channel_num = 4
+
+
 servo_eeprom_params64 = {
     "fix_header": (1, 2),
     "stretch_gain": (3, 4),
@@ -115,6 +125,122 @@ servo_eeprom_params64 = {
     "stretch_2": (61, 62),
     "stretch_3": (63, 64),
 }
+servo_eeprom_param_names = list(servo_eeprom_params64.keys())
+
+
+def _group_servo_eeprom_params():
+    groups = {}
+    for name, indices in servo_eeprom_params64.items():
+        groups.setdefault(len(indices), []).append(name)
+    return [
+        (names, np.array([servo_eeprom_params64[name] for name in names]))
+        for names in groups.values()
+    ]
+
+
+# Parameters grouped by nibble count as (names, 1-based byte indices),
+# so that each group is decoded with one four_bit_to_num_vector call.
+servo_eeprom_param_groups = _group_servo_eeprom_params()
+
+
+def decode_servo_params64(params):
+    """Decode all servo EEPROM parameters from the 64-byte params block.
+
+    Parameters
+    ----------
+    params : array_like
+        64 bytes of ServoStruct.params.
+
+    Returns
+    -------
+    dict
+        Mapping from parameter name to its decoded value.
+    """
+    values = np.asarray(params, dtype=np.int64)
+    decoded = {}
+    for names, indices in servo_eeprom_param_groups:
+        nibbles = values[indices - 1]
+        decoded.update(
+            zip(
+                names,
+                four_bit_to_num_vector(
+                    range(1, indices.shape[1] + 1), nibbles
+                ).tolist(),
+            )
+        )
+    return {name: decoded[name] for name in servo_eeprom_param_names}
+
+
+@lru_cache(maxsize=None)
+def _read_elf_symbols(path):
+    table = {}
+    with open(path, "rb") as stream:
+        elf = ELFFile(stream)
+        for section in elf.iter_sections():
+            if not isinstance(section, SymbolTableSection):
+                continue
+            for symbol in section.iter_symbols():
+                table[symbol.name] = symbol.entry["st_value"]
+    return table
+
+
+def build_elf_symbol_table(path, names):
+    """Return the addresses of the given symbols in an ELF file.
+
+    The ELF file is parsed only once per path; subsequent calls reuse
+    the cached symbol table.
+
+    Parameters
+    ----------
+    path : str
+        Path to the ELF file.
+    names : list[str]
+        Symbol names to look up.
+
+    Returns
+    -------
+    dict
+        Mapping from symbol name to its address.
+
+    Raises
+    ------
+    KeyError
+        If any of the symbols is not found in the ELF file.
+    """
+    table = _read_elf_symbols(str(path))
+    missing = [name for name in names if name not in table]
+    if missing:
+        raise KeyError(f"Symbols not found in {path}: {missing}")
+    return {name: table[name] for name in names}
+
+
+version_frame = bytes([0x03, CommandTypes.Version.value, 0x00])
+ack_frame = bytes([0x04, CommandTypes.AckCheck.value, 0x06, 0x08])
+
+# length, opcode, address, count, element size, skip size
+vector_op_header = struct.Struct("<BBIBBH")
+
+
+@lru_cache(maxsize=None)
+def slot_vector_struct(c_type, vcnt):
+    """Return a cached struct.Struct packing vcnt little-endian c_type values."""
+    try:
+        fmt = c_type_to_struct_format(c_type)
+    except KeyError:
+        raise RuntimeError(f"Not implemented case for typ {c_type}")
+    return struct.Struct("<" + fmt * vcnt)
+
+
+@lru_cache(maxsize=None)
+def cstruct_slot_info(cls, slot_name):
+    """Return (offset, c_type, element size, little-endian dtype) of a slot.
+
+    The structs are static, so the result is computed once per slot.
+    """
+    field = cls.__fields_types__[slot_name]
+    c_type = field.c_type
+    dtype = np.dtype(c_type_to_numpy_format(c_type)).newbyteorder("<")
+    return field.offset, c_type, c_type_to_size(c_type), dtype
 
 
 def padding_bytearray(ba, n):
@@ -126,11 +252,13 @@ def padding_bytearray(ba, n):
 
 
 class ARMH7Interface:
-    def __init__(self, timeout=0.1):
+    def __init__(self, timeout=0.1, pipeline_memory_read=False):
         self.lock = Lock()
         self.serial = None
         self.id_vector = None
         self.servo_sorted_ids = None
+        # Incremented whenever servo_on_states_dict changes.
+        self.servo_on_version = 0
         self.worm_sorted_ids = None
         self._armh7_address = None
         self._servo_id_to_worm_id = None
@@ -139,6 +267,9 @@ class ARMH7Interface:
         self._actuator_to_joint_matrix = None
         self._worm_ref_angle = None
         self._default_timeout = timeout
+        # Send all MREADV requests of a long memory_read before reading
+        # the replies. Only enable this when the firmware can queue them.
+        self.pipeline_memory_read = pipeline_memory_read
 
     def __del__(self):
         self.close()
@@ -172,11 +303,19 @@ class ARMH7Interface:
         except ValueError as e:
             print(f"Skipping reset for non-USB serial port: {e}")
         try:
-            self.serial = serial.Serial(port, baudrate, timeout=timeout)
+            self.serial = serial.Serial(
+                port, baudrate, timeout=timeout, inter_byte_timeout=None
+            )
             print(f"Opened {port} at {baudrate} baud")
         except serial.SerialException as e:
             print(f"Error opening serial port: {e}")
             raise serial.SerialException(e)
+        # Enlarge the driver buffers so replies are not split across reads.
+        # Only supported by the Windows backend of pyserial.
+        try:
+            self.serial.set_buffer_size(rx_size=8192, tx_size=8192)
+        except AttributeError:
+            pass
         # After powering on, the ACK value becomes unstable for some reason,
         # so the process is repeated several times.
         for _ in range(10):
@@ -241,13 +380,23 @@ class ARMH7Interface:
         self.serial = None
 
     def is_opened(self):
+        """Return True if the serial port is open.
+
+        This only checks local state and does not talk to the board, so it
+        is cheap enough to call at the top of every callback. Serial errors
+        raised by serial_write do not close the port; it only becomes
+        closed through close().
+        """
         return self.serial is not None
 
     def serial_write(self, byte_list):
         if self.serial is None:
             raise RuntimeError("Serial is not opened.")
 
-        data_to_send = bytes(byte_list)
+        if isinstance(byte_list, (bytes, bytearray)):
+            data_to_send = byte_list
+        else:
+            data_to_send = bytes(byte_list)
         with self.lock:
             try:
                 self.serial.write(data_to_send)
@@ -262,30 +411,34 @@ class ARMH7Interface:
         if timeout is None:
             timeout = self._default_timeout
 
-        start_time = time.time()
-        read_data = b""
-        while True:
-            remain_time = timeout - (time.time() - start_time)
+        deadline = time.time() + timeout
+        # The first byte of every reply is the total frame length.
+        header = b""
+        while not header:
+            remain_time = deadline - time.time()
             if remain_time <= 0:
                 raise serial.SerialException("Timeout: No data received.")
             ready, _, _ = select.select([self.serial], [], [], remain_time)
             if not ready:
                 continue
+            header = self.serial.read(1)
+            if not header:
+                raise serial.SerialException("Timeout: Incomplete data received.")
 
-            chunk = self.serial.read(self.serial.in_waiting or 1)
-            if not chunk:
+        n = header[0]
+        read_data = bytearray(header)
+        while len(read_data) < n:
+            if time.time() > deadline:
                 raise serial.SerialException("Timeout: Incomplete data received.")
-            read_data += chunk
-            if len(read_data) > 0 and read_data[0] == len(read_data):
-                return read_data[1 : len(read_data) - 1]
+            read_data += self.serial.read(n - len(read_data))
+        # strip length header and checksum
+        return bytes(read_data[1 : n - 1])
 
     def get_version(self):
-        byte_list = [0x03, CommandTypes.Version.value, 0x00]
-        return self.serial_write(byte_list).decode("utf-8")
+        return self.serial_write(version_frame).decode("utf-8")
 
     def get_ack(self):
-        byte_list = [0x04, CommandTypes.AckCheck.value, 0x06, 0x08]
-        return self.serial_write(byte_list)
+        return self.serial_write(ack_frame)
 
     def check_ack(self):
         ack_byte_list = self.get_ack()
@@ -314,40 +467,67 @@ class ARMH7Interface:
             self.close()
         raise RuntimeError("The firmware version is inconsistent.")
 
-    def memory_read_aux(self, addr, length):
-        """Memory Read Aux function"""
-        cnt = 1
+    @staticmethod
+    def memory_read_command(addr, length, cnt=1, skip_size=0):
+        """Build an MREADV frame.
+
+        Reads ``cnt`` blocks of ``length`` bytes, the k-th one starting
+        at ``addr + k * skip_size``.
+        """
         e_size = length
-        skip_size = 0
         n = 11
-        byte_list = [0] * n
-        byte_list[0] = n
-        byte_list[1] = 0xFB  # MREADV_OP
-        byte_list[2] = addr & 0xFF
-        byte_list[3] = (addr >> 8) & 0xFF
-        byte_list[4] = (addr >> 16) & 0xFF
-        byte_list[5] = (addr >> 24) & 0xFF
-        byte_list[6] = cnt
-        byte_list[7] = e_size
-        byte_list[8] = skip_size & 0xFF
-        byte_list[9] = (skip_size >> 8) & 0xFF
-        byte_list[10] = rcb4_checksum(byte_list)
-        return self.serial_write(byte_list)
+        byte_list = bytearray(n)
+        vector_op_header.pack_into(
+            byte_list, 0, n, 0xFB, addr, cnt, e_size, skip_size  # MREADV_OP
+        )
+        byte_list[n - 1] = rcb4_checksum(memoryview(byte_list)[: n - 1])
+        return byte_list
+
+    def memory_read_aux(self, addr, length):
+        """Memory Read Aux function"""
+        return self.serial_write(self.memory_read_command(addr, length))
+
+    def _pipelined_serial_reads(self, frames):
+        """Send all frames in one write and return the replies in order."""
+        if self.serial is None:
+            raise RuntimeError("Serial is not opened.")
+        with self.lock:
+            try:
+                self.serial.write(b"".join(frames))
+            except serial.SerialException as e:
+                print(f"Error sending data: {e}")
+            return [self.serial_read() for _ in frames]
+
+    def _pipelined_memory_read(self, frames):
+        return b"".join(self._pipelined_serial_reads(frames))
 
     def memory_read(self, addr, length):
-        limit = 250
-        if length < limit:
-            return self.memory_read_aux(addr, length)
-        elif length < 2 * limit:
-            return self.memory_read_aux(addr, limit) + self.memory_read_aux(
-                addr + limit, length - limit
+        """Read length bytes from the board memory starting at addr.
+
+        Parameters
+        ----------
+        addr : int
+            Start address.
+        length : int
+            Number of bytes to read.
+
+        Returns
+        -------
+        bytes
+            Read data.
+        """
+        limit = mreadv_max_size
+        chunks = [
+            (addr + offset, min(limit, length - offset))
+            for offset in range(0, length, limit)
+        ]
+        if self.pipeline_memory_read and len(chunks) > 1:
+            ret = self._pipelined_memory_read(
+                [self.memory_read_command(a, size) for a, size in chunks]
             )
         else:
-            return (
-                self.memory_read_aux(addr, limit)
-                + self.memory_read_aux(addr + limit, limit)
-                + self.memory_read_aux(addr + 2 * limit, length - 2 * limit)
-            )
+            ret = b"".join(self.memory_read_aux(a, size) for a, size in chunks)
+        return ret
 
     def memory_cstruct(self, cls, v_idx=0, addr=None, size=None):
         if addr is None:
@@ -364,15 +544,11 @@ class ARMH7Interface:
         skip_size = 0
         n = length + 11
         byte_list = bytearray(n)
-        byte_list[0] = n
-        byte_list[1] = 0xFC  # MWRITEV_OP
-        byte_list[2:6] = addr.to_bytes(4, byteorder="little")
-        byte_list[6] = cnt
-        byte_list[7] = e_size
-        byte_list[8:10] = skip_size.to_bytes(2, byteorder="little")
-        for i in range(length):
-            byte_list[10 + i] = data[i]
-        byte_list[10 + length] = rcb4_checksum(byte_list[0 : n - 1])
+        vector_op_header.pack_into(
+            byte_list, 0, n, 0xFC, addr, cnt, e_size, skip_size  # MWRITEV_OP
+        )
+        byte_list[10 : 10 + length] = data[:length]
+        byte_list[n - 1] = rcb4_checksum(memoryview(byte_list)[: n - 1])
         return self.serial_write(byte_list)
 
     def cfunc_call(self, func_string, *args):
@@ -380,70 +556,78 @@ class ARMH7Interface:
         argc = len(args)
         n = 8 + 4 * argc
         byte_list = bytearray(n)
-        byte_list[0] = n
-        byte_list[1] = 0xFA
-        byte_list[2:6] = int(addr).to_bytes(4, byteorder="little")
-        byte_list[6] = argc
-        for i in range(argc):
-            byte_list[7 + i * 4 : 7 + (i + 1) * 4] = int(args[i]).to_bytes(
-                4, byteorder="little"
-            )
-        byte_list[n - 1] = rcb4_checksum(byte_list[0 : n - 1])
+        struct.pack_into(
+            f"<BBIB{argc}I",
+            byte_list,
+            0,
+            n,
+            0xFA,  # CFUNC_CALL_OP
+            int(addr),
+            argc,
+            *(int(arg) for arg in args),
+        )
+        byte_list[n - 1] = rcb4_checksum(memoryview(byte_list)[: n - 1])
         return self.serial_write(byte_list)
 
     def write_cls_alist(self, cls, idx, slot_name, vec):
         baseaddr = self.armh7_address[cls.__name__]
         cls_size = cls.size
-        typ = cls.__fields_types__[slot_name].c_type
-        slot_size = c_type_to_size(typ)
-        slot_offset = cls.__fields_types__[slot_name].offset
-        cnt = 1
+        slot_offset, typ, slot_size, _ = cstruct_slot_info(cls, slot_name)
         addr = baseaddr + (idx * cls_size) + slot_offset
-        data = bytearray(slot_size)
-
-        if cnt == 1:
-            v = None
-            if isinstance(vec, list):
-                v = vec[0]
-            else:
-                v = vec
-            if typ == "float":
-                byte_data = struct.pack("f", v)
-                byte_data = struct.unpack("4B", byte_data)
-            elif typ == "uint16":
-                byte_data = struct.pack("H", v)
-                byte_data = struct.unpack("BB", byte_data)
-            elif typ == "uint8":
-                # Unpacking a single byte.
-                byte_data = struct.pack("B", v)
-                byte_data = struct.unpack("B", byte_data)
-            else:
-                raise RuntimeError(f"not implemented typ {typ}")
-            data[0 : len(byte_data)] = byte_data
-        else:
-            raise NotImplementedError
+        v = vec[0] if isinstance(vec, list) else vec
+        data = slot_vector_struct(typ, 1).pack(v)
         return self.memory_write(addr, slot_size, data)
 
-    def read_cstruct_slot_vector(self, cls, slot_name):
+    def read_cstruct_slot_vector_command(self, cls, slot_name):
         vcnt = c_vector[cls.__name__] or 1
         addr = self.armh7_address[cls.__name__]
         cls_size = cls.size
-        slot_offset = cls.__fields_types__[slot_name].offset
-        c_type = cls.__fields_types__[slot_name].c_type
-        element_size = c_type_to_size(c_type)
-        n = 11
-        byte_list = np.zeros(n, dtype=np.uint8)
-        byte_list[0] = n
-        byte_list[1] = 0xFB  # MREADV_OP
-        byte_list[2:6] = np.array(
-            [(addr + slot_offset) >> (i * 8) & 0xFF for i in range(4)], dtype=np.uint8
+        slot_offset, _, element_size, _ = cstruct_slot_info(cls, slot_name)
+        return self.memory_read_command(
+            addr + slot_offset, element_size, cnt=vcnt, skip_size=cls_size
         )
-        byte_list[6] = vcnt
-        byte_list[7] = element_size
-        byte_list[8] = cls_size
-        byte_list[n - 1] = rcb4_checksum(byte_list)
-        b = self.serial_write(byte_list)
-        return np.frombuffer(b, dtype=c_type_to_numpy_format(c_type))
+
+    def read_cstruct_slot_vector(self, cls, slot_name):
+        vcnt = c_vector[cls.__name__] or 1
+        dtype = cstruct_slot_info(cls, slot_name)[3]
+        b = self.serial_write(self.read_cstruct_slot_vector_command(cls, slot_name))
+        return np.frombuffer(b, dtype=dtype, count=vcnt)
+
+    def read_cstruct_slot_vectors(self, cls_and_slot_names):
+        """Read several cstruct slot vectors.
+
+        When ``pipeline_memory_read`` is enabled, all requests are sent in
+        a single write and the replies are read back in order, so the
+        serial round trip is paid once instead of once per slot.
+
+        Parameters
+        ----------
+        cls_and_slot_names : list of tuple
+            List of ``(cls, slot_name)``.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Slot vectors in the same order as ``cls_and_slot_names``.
+        """
+        if not self.pipeline_memory_read:
+            return [
+                self.read_cstruct_slot_vector(cls, slot_name)
+                for cls, slot_name in cls_and_slot_names
+            ]
+        frames = [
+            self.read_cstruct_slot_vector_command(cls, slot_name)
+            for cls, slot_name in cls_and_slot_names
+        ]
+        replies = self._pipelined_serial_reads(frames)
+        return [
+            np.frombuffer(
+                b,
+                dtype=cstruct_slot_info(cls, slot_name)[3],
+                count=c_vector[cls.__name__] or 1,
+            )
+            for b, (cls, slot_name) in zip(replies, cls_and_slot_names)
+        ]
 
     def read_jointbase_sensor_ids(self):
         if self.id_vector is None:
@@ -587,20 +771,52 @@ class ARMH7Interface:
         all_servo_ids = self.search_servo_ids()
         if len(all_servo_ids) == 0:
             return np.zeros(shape=0)
-        av = self.servo_angle_vector_to_angle_vector(
-            self._angle_vector()[all_servo_ids], all_servo_ids
+        current_angles, worm_av = self.read_cstruct_slot_vectors(
+            [(ServoStruct, "current_angle"), (WormmoduleStruct, "present_angle")]
         )
-        worm_av = self.read_cstruct_slot_vector(
-            WormmoduleStruct, slot_name="present_angle"
+        av = self._joint_angle_vector(current_angles, worm_av, all_servo_ids)
+        if servo_ids is not None:
+            if len(servo_ids) == 0:
+                return np.zeros(shape=0)
+            av = av[self.sequentialized_servo_ids(servo_ids)]
+        return av
+
+    def read_state_bundle(self):
+        """Read the joint angle vector and the servo error together.
+
+        Returns
+        -------
+        av : numpy.ndarray
+            Same as ``angle_vector()``.
+        error : numpy.ndarray
+            Same as ``servo_error()``.
+        """
+        all_servo_ids = self.search_servo_ids()
+        if len(all_servo_ids) == 0:
+            return np.zeros(shape=0), np.zeros(shape=0)
+        current_angles, error_angles, worm_av = self.read_cstruct_slot_vectors(
+            [
+                (ServoStruct, "current_angle"),
+                (ServoStruct, "error_angle"),
+                (WormmoduleStruct, "present_angle"),
+            ]
+        )
+        av = self._joint_angle_vector(current_angles, worm_av, all_servo_ids)
+        return av, error_angles[all_servo_ids]
+
+    def _joint_angle_vector(self, current_angles, worm_av, all_servo_ids):
+        """Convert the current_angle slot vector into joint angles.
+
+        Joints driven by a worm module take the module's present_angle
+        instead of the servo angle.
+        """
+        av = self.servo_angle_vector_to_angle_vector(
+            current_angles[all_servo_ids], all_servo_ids
         )
         for worm_idx in self.search_worm_ids():
             av[self.servo_id_to_index(self.worm_id_to_servo_id[worm_idx])] = worm_av[
                 worm_idx
             ]
-        if servo_ids is not None:
-            if len(servo_ids) == 0:
-                return np.zeros(shape=0)
-            av = av[self.sequentialized_servo_ids(servo_ids)]
         return av
 
     def servo_angle_vector_to_angle_vector(self, servo_av, servo_ids=None):
@@ -688,15 +904,17 @@ class ARMH7Interface:
             return self.servo_sorted_ids
         servo_indices = []
         wheel_indices = []
+        flags = self.read_cstruct_slot_vector(ServoStruct, "flag")
+        rotations = self.read_cstruct_slot_vector(ServoStruct, "rotation")
+        feedbacks = self.read_cstruct_slot_vector(ServoStruct, "feedback")
         for idx in range(rcb4_dof):
-            servo = self.memory_cstruct(ServoStruct, idx)
-            if servo.flag > 0:
+            if flags[idx] > 0:
                 servo_indices.append(idx)
                 if idx not in self._servo_id_to_worm_id:
                     # wheel
-                    if servo.rotation > 0:
+                    if rotations[idx] > 0:
                         wheel_indices.append(idx)
-                    if servo.feedback > 0:
+                    if feedbacks[idx] > 0:
                         self.set_cstruct_slot(ServoStruct, idx, "feedback", 0)
         servo_indices = np.array(servo_indices)
         self.wheel_servo_sorted_ids = sorted(wheel_indices)
@@ -715,6 +933,7 @@ class ARMH7Interface:
                 self.servo_on_states_dict[index] = True
             else:
                 self.servo_on_states_dict[index] = False
+        self.servo_on_version += 1
         # internally call actuator_to_joint_matrix to initialize it.
         self.actuator_to_joint_matrix  # NOQA
         return servo_indices
@@ -790,11 +1009,19 @@ class ARMH7Interface:
             raise ValueError("Length of servo_ids and servo_vector must be the same.")
 
         # Update servo on/off states based on 32767(Servo ON) and 32768(Servo OFF) values in servo_vector
+        changed = False
         for servo_id, angle in zip(servo_ids, servo_vector):
             if angle == ServoOnOffValues.ON.value:
-                self.servo_on_states_dict[servo_id] = True
+                state = True
             elif angle == ServoOnOffValues.OFF.value:
-                self.servo_on_states_dict[servo_id] = False
+                state = False
+            else:
+                continue
+            if self.servo_on_states_dict.get(servo_id) != state:
+                self.servo_on_states_dict[servo_id] = state
+                changed = True
+        if changed:
+            self.servo_on_version += 1
 
         # Filter servo IDs based on their on state in servo_on_states_dict
         active_ids = []
@@ -847,16 +1074,45 @@ class ARMH7Interface:
         # send the command
         return self.serial_write(byte_list)
 
+    def servo_param64_vector(self, param_name):
+        """Read a servo EEPROM parameter of all servos at once.
+
+        Only the bytes of ServoStruct.params holding the parameter are
+        read, strided over the servo vector in a single MREADV request.
+
+        Parameters
+        ----------
+        param_name : str
+            Key of servo_eeprom_params64.
+
+        Returns
+        -------
+        numpy.ndarray
+            Decoded parameter values indexed by servo ID.
+        """
+        indices = servo_eeprom_params64[param_name]
+        start = min(indices) - 1
+        length = max(indices) - start
+        vcnt = c_vector[ServoStruct.__name__]
+        addr = (
+            self.armh7_address[ServoStruct.__name__]
+            + cstruct_slot_info(ServoStruct, "params")[0]
+            + start
+        )
+        b = self.serial_write(
+            self.memory_read_command(addr, length, cnt=vcnt, skip_size=ServoStruct.size)
+        )
+        params = np.frombuffer(b, dtype=np.uint8, count=vcnt * length).reshape(
+            vcnt, length
+        )
+        return four_bit_to_num_vector([index - start for index in indices], params)
+
     def servo_param64(self, sid, param_names=None):
         v = self.memory_cstruct(ServoStruct, sid)
-        param_values = {}
+        param_values = decode_servo_params64(v.params)
         if param_names is None:
-            param_names = list(servo_eeprom_params64.keys())
-        for param_name in param_names:
-            indices = servo_eeprom_params64[param_name]
-            param_value = four_bit_to_num(indices, v.params)
-            param_values[param_name] = param_value
-        return param_values
+            return param_values
+        return {param_name: param_values[param_name] for param_name in param_names}
 
     def read_stretch(self, servo_ids=None):
         """Returns servo motor stretch value.
@@ -881,10 +1137,8 @@ class ARMH7Interface:
         """
         if servo_ids is None:
             servo_ids = self.servo_sorted_ids
-        return [
-            self.servo_param64(sid, ["stretch_gain"])["stretch_gain"] // 2
-            for sid in servo_ids
-        ]
+        stretch_gains = self.servo_param64_vector("stretch_gain")
+        return (stretch_gains[np.asarray(servo_ids, dtype=np.int64)] // 2).tolist()
 
     def send_stretch(self, value=127, servo_ids=None):
         """Write stretch value to servo motor.
@@ -956,16 +1210,28 @@ class ARMH7Interface:
         byte_list.append(rcb4_checksum(byte_list))
         return self.serial_write(byte_list)
 
-    def read_quaternion(self):
-        cs = self.memory_cstruct(Madgwick, 0)
+    def imu_sample(self):
+        """Read the Madgwick filter state once.
+
+        The returned struct can be passed to read_quaternion, read_rpy,
+        read_imu_data and gyro_norm_vector to decode several values from
+        the same sample without additional serial round trips.
+        """
+        return self.memory_cstruct(Madgwick, 0)
+
+    def read_quaternion(self, cs=None):
+        if cs is None:
+            cs = self.imu_sample()
         return np.array([cs.q0, cs.q1, cs.q2, cs.q3], dtype=np.float32)
 
-    def read_rpy(self):
-        cs = self.memory_cstruct(Madgwick, 0)
+    def read_rpy(self, cs=None):
+        if cs is None:
+            cs = self.imu_sample()
         return [cs.roll, cs.pitch, cs.yaw]
 
-    def read_imu_data(self):
-        cs = self.memory_cstruct(Madgwick, 0)
+    def read_imu_data(self, cs=None):
+        if cs is None:
+            cs = self.imu_sample()
         # MPU9250 acceleration measurement range is +-8g
         acc = convert_data(cs.acc, 8)
         g = 9.81
@@ -977,9 +1243,11 @@ class ARMH7Interface:
         gyro = np.deg2rad(gyro)
         return q_wxyz, acc, gyro
 
-    def gyro_norm_vector(self):
-        g = self.memory_cstruct(Madgwick, 0).gyro
-        n = np.sqrt(g[0] ** 2 + g[1] ** 2 + g[2] ** 2)
+    def gyro_norm_vector(self, cs=None):
+        if cs is None:
+            cs = self.imu_sample()
+        g = cs.gyro
+        n = math.sqrt(g[0] * g[0] + g[1] * g[1] + g[2] * g[2])
         return (n, g)
 
     def set_cstruct_slot(self, cls, idx, slot_name, v):
@@ -989,26 +1257,11 @@ class ARMH7Interface:
 
         baseaddr = self.armh7_address[cls.__name__]
         cls_size = cls.size
-        typ = cls.__fields_types__[slot_name].c_type
-        slot_size = cnt * c_type_to_size(typ)
-        slot_offset = cls.__fields_types__[slot_name].offset
+        slot_offset, typ, esize, _ = cstruct_slot_info(cls, slot_name)
+        slot_size = cnt * esize
         addr = baseaddr + (idx * cls_size) + slot_offset
-        bytes = bytearray(slot_size)
-
-        byte_data = b""
-        for value in v:
-            if typ == "float":
-                tmp_byte_data = struct.pack("f", value)
-                byte_data += struct.unpack("4B", tmp_byte_data)
-            elif typ == "uint16":
-                tmp_byte_data = struct.pack("H", value)
-                byte_data += struct.unpack("BB", tmp_byte_data)
-            elif typ == "uint8":
-                byte_data += value.to_bytes(1, "little")
-            else:
-                raise RuntimeError(f"not implemented typ {typ}")
-        bytes[0 : len(byte_data)] = byte_data
-        return self.memory_write(addr, slot_size, bytes)
+        data = slot_vector_struct(typ, cnt).pack(*v)
+        return self.memory_write(addr, slot_size, data)
 
     def search_worm_ids(self):
         if self.worm_sorted_ids is not None:
@@ -1016,16 +1269,19 @@ class ARMH7Interface:
         indices = []
         self._servo_id_to_worm_id = {}
         self._worm_id_to_servo_id = {}
+        module_types = self.read_cstruct_slot_vector(WormmoduleStruct, "module_type")
+        worm_servo_ids = self.read_cstruct_slot_vector(WormmoduleStruct, "servo_id")
+        rotations = self.read_cstruct_slot_vector(ServoStruct, "rotation")
+        feedbacks = self.read_cstruct_slot_vector(ServoStruct, "feedback")
         for idx in range(max_sensor_num):
-            worm = self.memory_cstruct(WormmoduleStruct, idx)
-            if worm.module_type == 1:
-                servo = self.memory_cstruct(ServoStruct, worm.servo_id)
-                if servo.rotation == 1:
+            if module_types[idx] == 1:
+                servo_id = int(worm_servo_ids[idx])
+                if rotations[servo_id] == 1:
                     indices.append(idx)
-                    if servo.feedback > 0:
-                        self.set_cstruct_slot(ServoStruct, worm.servo_id, "feedback", 0)
-                self._servo_id_to_worm_id[worm.servo_id] = idx
-                self._worm_id_to_servo_id[idx] = worm.servo_id
+                    if feedbacks[servo_id] > 0:
+                        self.set_cstruct_slot(ServoStruct, servo_id, "feedback", 0)
+                self._servo_id_to_worm_id[servo_id] = idx
+                self._worm_id_to_servo_id[idx] = servo_id
         self.worm_sorted_ids = indices
         return indices
 
@@ -1224,10 +1480,7 @@ class ARMH7Interface:
         addr = self.armh7_address[cls.__name__]
         skip_size = cls.size
         cnt = 1
-        typ = cls.__fields_types__[slot_name].c_type
-        esize = c_type_to_size(typ)
-        offset = cls.__fields_types__[slot_name].offset
-        c_type = cls.__fields_types__[slot_name].c_type
+        offset, typ, esize, dtype = cstruct_slot_info(cls, slot_name)
         tsize = cnt * esize
 
         n = 11 + tsize * vcnt
@@ -1243,38 +1496,37 @@ class ARMH7Interface:
         byte_list[7] = tsize
         struct.pack_into("<H", byte_list, 8, skip_size)
 
-        for i in range(vcnt):
-            if cnt == 1:
-                if (
-                    isinstance(vec, list)
-                    or isinstance(vec, tuple)
-                    or isinstance(vec, np.ndarray)
-                ):
-                    if isinstance(vec, np.ndarray):
-                        v = float(vec[i])
-                    else:
-                        v = vec[i]
-                else:
-                    v = vec
-                if not isinstance(v, (int, float)):
-                    v = v[0] if len(v) > 1 else v
-                if typ == "uint8":
-                    v = int(round(v))
-                    struct.pack_into("<B", byte_list, 10 + i * esize, v)
-                elif typ == "uint16":
-                    v = int(round(v))
-                    struct.pack_into("<H", byte_list, 10 + i * esize, v)
-                elif typ == "int16":
-                    v = int(round(v))
-                    struct.pack_into("<h", byte_list, 10 + i * esize, v)
-                elif typ == "uint32":
-                    v = int(round(v))
-                    struct.pack_into("<I", byte_list, 10 + i * esize, v)
-                elif typ in ("float", "double"):
-                    struct.pack_into("<f", byte_list, 10 + i * esize, v)
-                else:
-                    raise RuntimeError(f"Not implemented case for typ {typ}")
+        if cnt == 1:
+            if isinstance(vec, np.ndarray):
+                values = vec[:vcnt]
+            elif isinstance(vec, (list, tuple)):
+                values = [
+                    v if isinstance(v, (int, float)) else (v[0] if len(v) > 1 else v)
+                    for v in vec[:vcnt]
+                ]
+            else:
+                values = [vec] * vcnt
+            if len(values) < vcnt:
+                raise IndexError(
+                    f"{slot_name} requires {vcnt} values, but got {len(values)}"
+                )
+            values = np.asarray(values, dtype=np.float64)
+            if not np.all(np.isfinite(values)):
+                raise ValueError(f"{slot_name} values must be finite, got {values}")
+            if typ in ("float", "double"):
+                limits = np.finfo(dtype)
             else:
+                values = np.round(values)
+                limits = np.iinfo(dtype)
+            # The cast below would silently wrap out of range values.
+            low, high = limits.min, limits.max
+            if np.any(values < low) or np.any(values > high):
+                raise ValueError(
+                    f"{slot_name} values must be in [{low}, {high}] for {typ}"
+                )
+            byte_list[10 : 10 + tsize * vcnt] = values.astype(dtype).tobytes()
+        else:
+            for i in range(vcnt):
                 for j in range(cnt):
                     v = vec[i][j]
                     if typ in ("uint8", "uint16", "uint32"):
@@ -1287,7 +1539,7 @@ class ARMH7Interface:
         byte_list[n - 1] = rcb4_checksum(byte_list)
         s = self.serial_write(byte_list)
         s = padding_bytearray(s, tsize)
-        return np.frombuffer(s, dtype=c_type_to_numpy_format(c_type))
+        return np.frombuffer(s, dtype=dtype)
 
     def read_jb_cstruct(self, idx):
         return self.memory_cstruct(SensorbaseStruct, idx - sensor_sidx)
@@ -1298,7 +1550,88 @@ class ARMH7Interface:
     def all_jointbase_sensors(self):
         if self.id_vector is None:
             self.read_jointbase_sensor_ids()
-        return [self.read_jb_cstruct(idx) for idx in self.id_vector]
+        if len(self.id_vector) == 0:
+            return []
+        # Reading the whole span only pays off when the connected sensors
+        # are dense. Otherwise read each struct so that the gaps between
+        # sensors are not transferred.
+        size = SensorbaseStruct.size
+        span_frames = -(
+            -(self.id_vector[-1] - self.id_vector[0] + 1) * size // mreadv_max_size
+        )
+        struct_frames = -(-size // mreadv_max_size)
+        if span_frames > len(self.id_vector) * struct_frames:
+            return [self.read_jb_cstruct(idx) for idx in self.id_vector]
+        first = self.id_vector[0] - sensor_sidx
+        buf = self.memory_read(
+            self.armh7_address[SensorbaseStruct.__name__] + first * size,
+            (self.id_vector[-1] - self.id_vector[0] + 1) * size,
+        )
+        sensors = []
+        for idx in self.id_vector:
+            start = (idx - sensor_sidx - first) * size
+            sensors.append(SensorbaseStruct(buf[start : start + size]))
+        return sensors
+
+    def jointbase_sensor_arrays(self):
+        """Return the proximity and force adc values of all jointbase sensors.
+
+        Only the id, adc and ps bytes of each struct are read, strided
+        over the connected slots, so a call costs one or two MREADV frames
+        however the sensors are laid out.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            ``(ids, ps, adc)``. ``ids`` holds the ``id`` field of each
+            sensor struct and has shape (n_sensors,), ``ps`` and ``adc``
+            have shape (n_sensors, n_channels).
+        """
+        if self.id_vector is None:
+            self.read_jointbase_sensor_ids()
+        if len(self.id_vector) == 0:
+            empty = np.zeros((0, jointbase_sensor_channel_num), dtype=np.uint16)
+            return np.zeros(0, dtype=np.int64), empty, empty.copy()
+        id_offset = cstruct_slot_info(SensorbaseStruct, "id")[0]
+        channel_slots = [
+            cstruct_slot_info(SensorbaseStruct, slot_name)
+            for slot_name in ("ps", "adc")
+        ]
+        e_size = (
+            max(
+                offset + size * jointbase_sensor_channel_num
+                for offset, _, size, _ in channel_slots
+            )
+            - id_offset
+        )
+        size = SensorbaseStruct.size
+        first = self.id_vector[0] - sensor_sidx
+        n = self.id_vector[-1] - sensor_sidx - first + 1
+        addr = self.armh7_address[SensorbaseStruct.__name__] + first * size + id_offset
+        cnt_per_frame = mreadv_max_size // e_size
+        frames = [
+            self.memory_read_command(
+                addr + k * size,
+                e_size,
+                cnt=min(cnt_per_frame, n - k),
+                skip_size=size,
+            )
+            for k in range(0, n, cnt_per_frame)
+        ]
+        if self.pipeline_memory_read and len(frames) > 1:
+            buf = self._pipelined_memory_read(frames)
+        else:
+            buf = b"".join(self.serial_write(frame) for frame in frames)
+        records = np.frombuffer(buf, dtype=np.uint8, count=n * e_size).reshape(
+            n, e_size
+        )[np.asarray(self.id_vector) - sensor_sidx - first]
+        ids = records[:, 0].astype(np.int64)
+        values = []
+        for offset, _, element_size, dtype in channel_slots:
+            start = offset - id_offset
+            end = start + element_size * jointbase_sensor_channel_num
+            values.append(np.ascontiguousarray(records[:, start:end]).view(dtype))
+        return ids, values[0], values[1]
 
     def all_air_boards(self):
         jointbase_sensors = self.all_jointbase_sensors()
@@ -1424,16 +1757,10 @@ class ARMH7Interface:
     def armh7_address(self):
         if self._armh7_address is not None:
             return self._armh7_address
-        self._armh7_address = {name: "" for name in armh7_variable_list}
         version = self.get_version()
-        with open(kondoh7_elf(version), "rb") as stream:
-            elf = ELFFile(stream)
-            for section in elf.iter_sections():
-                if isinstance(section, SymbolTableSection):
-                    for symbol in section.iter_symbols():
-                        if symbol.name in self._armh7_address:
-                            address = symbol.entry["st_value"]
-                            self._armh7_address[symbol.name] = address
+        self._armh7_address = build_elf_symbol_table(
+            kondoh7_elf(version), armh7_variable_list
+        )
         return self._armh7_address
 
     def servo_states(self):
@@ -1482,9 +1809,8 @@ class ARMH7Interface:
     def read_current_limit(self, servo_ids=None):
         if servo_ids is None:
             servo_ids = self.servo_sorted_ids
-        current_vector = [
-            self.servo_param64(sid, ["current_limit"])["current_limit"]
-            for sid in servo_ids
+        current_vector = self.servo_param64_vector("current_limit")[
+            np.asarray(servo_ids, dtype=np.int64)
         ]
         return interpolate_currents(current_vector)
 
@@ -1519,9 +1845,8 @@ class ARMH7Interface:
     def read_temperature_limit(self, servo_ids=None):
         if servo_ids is None:
             servo_ids = self.servo_sorted_ids
-        temperature_vector = [
-            self.servo_param64(sid, ["temperature_limit"])["temperature_limit"]
-            for sid in servo_ids
+        temperature_vector = self.servo_param64_vector("temperature_limit")[
+            np.asarray(servo_ids, dtype=np.int64)
         ]
         return interpolate_or_extrapolate_temperatures(temperature_vector)
 
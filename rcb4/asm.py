@@ -1,9 +1,10 @@
 from typing import List
+from typing import Union
 
 import numpy as np
 
 
-def rcb4_checksum(byte_list: List[int]) -> int:
+def rcb4_checksum(byte_list: Union[List[int], bytes, bytearray, memoryview]) -> int:
     """Calculates the checksum for a list of byte values.
 
     The checksum is calculated as the sum of all byte values,
@@ -11,14 +12,18 @@ def rcb4_checksum(byte_list: List[int]) -> int:
 
     Parameters
     ----------
-    byte_list : list of int
-        The list of byte values for which the checksum is to be calculated.
+    byte_list : list of int, bytes, bytearray or memoryview
+        The byte values for which the checksum is to be calculated.
+        Buffer objects are summed directly without copying.
 
     Returns
     -------
     int
         The calculated checksum.
     """
+    if isinstance(byte_list, (bytes, bytearray, memoryview)):
+        # Buffer elements are already in the range 0-255.
+        return sum(byte_list) & 0xFF
     return sum(b & 0xFF for b in byte_list) & 0xFF
 
 
@@ -204,5 +209,34 @@ def four_bit_to_num(lst: List[int], values: List[int]):
     return result
 
 
+def four_bit_to_num_vector(lst: List[int], values) -> np.ndarray:
+    """Vectorized version of four_bit_to_num.
+
+    Decodes the same nibble indices from every row of a 2D array at once.
+
+    Parameters
+    ----------
+    lst : List[int]
+        1-based indices of the nibbles to combine, most significant first.
+    values : array_like
+        Array of shape (N, M) holding one byte per nibble.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (N,) with the decoded values.
+
+    Examples
+    --------
+    >>> four_bit_to_num_vector([1, 2], [[0x01, 0x02], [0x0F, 0x00]])
+    array([ 18, 240])
+    """
+    values = np.asarray(values, dtype=np.int64)
+    result = np.zeros(values.shape[:-1], dtype=np.int64)
+    for index in lst:
+        result = (result << 4) | (values[..., index - 1] & 0x0F)
+    return result
+
+
 def rcb4_servo_svector(ids: List[int], svector: List[float]) -> List[int]:
     return [int(round(v)) & 0xFF for _, v in zip(ids, svector)]
@@ -11,18 +11,37 @@ type_mapping = {
     "double": np.float64,
 }
 
+size_mapping = {
+    "uint8": 1,
+    "uint16": 2,
+    "float": 4,
+    "double": 8,
+    "int": 4,
+    "int8": 1,
+    "int16": 2,
+    "int32": 4,
+    "uint32": 4,
+}
+
+struct_format_mapping = {
+    "int8": "b",
+    "int16": "h",
+    "int32": "i",
+    "uint8": "B",
+    "uint16": "H",
+    "uint32": "I",
+    "float": "f",
+    "double": "d",
+}
+
 
 def c_type_to_size(c_type):
-    return {
-        "uint8": 1,
-        "uint16": 2,
-        "float": 4,
-        "double": 8,
-        "int": 4,
-        "int16": 2,
-        "uint32": 4,
-    }[c_type]
+    return size_mapping[c_type]
 
 
 def c_type_to_numpy_format(c_type):
-    return type_mapping.get(c_type, lambda: ValueError(f"c_type {c_type}"))()
+    return type_mapping[c_type]
+
+
+def c_type_to_struct_format(c_type):
+    return struct_format_mapping[c_type]
@@ -272,6 +272,8 @@ class RCB4Interface:
         self.lock = Lock()
         self.serial = None
         self.servo_sorted_ids = None
+        # Incremented whenever servo_on_states_dict changes.
+        self.servo_on_version = 0
         self.wheel_servo_sorted_ids = None
         self._joint_to_actuator_matrix = None
         self._actuator_to_joint_matrix = None
@@ -330,6 +332,12 @@ class RCB4Interface:
         self.serial = None
 
     def is_opened(self):
+        """Return True if the serial port is open.
+
+        This only checks local state and does not talk to the board, so it
+        is cheap enough to call at the top of every callback. The port is
+        closed automatically on communication errors.
+        """
         return self.serial is not None
 
     def serial_write(self, byte_list, timeout=10):
@@ -585,6 +593,7 @@ class RCB4Interface:
                 self.servo_on_states_dict[index] = True
             else:
                 self.servo_on_states_dict[index] = False
+        self.servo_on_version += 1
         return servo_indices
 
     def valid_servo_ids(self, servo_ids):
@@ -644,11 +653,19 @@ class RCB4Interface:
             raise ValueError("Length of servo_ids and servo_vector must be the same.")
 
         # Update servo on/off states based on 32767 (Servo ON) and 32768 (Servo OFF) values in servo_vector
+        changed = False
         for servo_id, angle in zip(servo_ids, servo_vector):
             if angle == ServoOnOffValues.ON.value:
-                self.servo_on_states_dict[servo_id] = True
+                state = True
             elif angle == ServoOnOffValues.OFF.value:
-                self.servo_on_states_dict[servo_id] = False
+                state = False
+            else:
+                continue
+            if self.servo_on_states_dict.get(servo_id) != state:
+                self.servo_on_states_dict[servo_id] = state
+                changed = True
+        if changed:
+            self.servo_on_version += 1
 
         # Filter servo IDs based on their on state in servo_on_states_dict
         active_ids = []
@@ -0,0 +1,34 @@
+import yaml
+
+# Prefer the libyaml-backed loader when PyYAML was built with it.
+yaml_safe_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml_section(stream, key, Loader=yaml_safe_loader):
+    """Load only one top-level section of a YAML document.
+
+    The document is composed into a node graph, but only the node under
+    ``key`` is constructed into Python objects.
+
+    Parameters
+    ----------
+    stream : str or file-like object
+        The YAML document.
+    key : str
+        The top-level key to load.
+
+    Returns
+    -------
+    data : object
+        The constructed value of ``key``.
+    """
+    loader = Loader(stream)
+    try:
+        root = loader.get_single_node()
+        if isinstance(root, yaml.MappingNode):
+            for key_node, value_node in root.value:
+                if key_node.value == key:
+                    return loader.construct_document(value_node)
+    finally:
+        loader.dispose()
+    raise KeyError(key)
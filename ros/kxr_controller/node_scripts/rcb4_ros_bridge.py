@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 
-from collections import deque
+import hashlib
+import io
+import json
 import os
 import os.path as osp
-import shlex
+import queue
 import subprocess
 import sys
-import tempfile
 import threading
+import time
 import xml.etree.ElementTree as ET
 
 import actionlib
@@ -19,6 +21,7 @@ import geometry_msgs.msg
 from kxr_controller.cfg import KXRParameteresConfig as Config
 from kxr_controller.msg import AdjustAngleVectorAction
 from kxr_controller.msg import AdjustAngleVectorResult
+from kxr_controller.msg import JointbaseSensorArray
 from kxr_controller.msg import PressureControl
 from kxr_controller.msg import PressureControlAction
 from kxr_controller.msg import PressureControlResult
@@ -31,6 +34,8 @@ from kxr_controller.msg import Stretch
 from kxr_controller.msg import StretchAction
 from kxr_controller.msg import StretchResult
 from kxr_controller.serial import serial_call_with_retry
+from kxr_controller.serial import serial_errors
+from kxr_controller.subscriber_count import SubscriberCounter
 import numpy as np
 import rospy
 import sensor_msgs.msg
@@ -40,16 +45,30 @@ from skrobot.model import RobotModel
 from skrobot.utils.urdf import no_mesh_load_mode
 import std_msgs.msg
 from trajectory_msgs.msg import JointTrajectoryPoint
-import yaml
 
 from rcb4.armh7interface import ARMH7Interface
 from rcb4.rcb4interface import RCB4Interface
 from rcb4.rcb4interface import ServoOnOffValues
+from rcb4.yaml_utils import load_yaml_section
+from rcb4.yaml_utils import yaml_safe_loader
 
-np.set_printoptions(precision=0, suppress=True)
+_rad2deg = 180.0 / np.pi
+_deg2rad = np.pi / 180.0
 
 
-def load_yaml(file_path, Loader=yaml.SafeLoader):
+def yaml_cache_path(file_path):
+    """Return the JSON cache path of a parsed YAML file.
+
+    The cache lives under ``$ROS_HOME`` (``~/.ros`` by default), keyed by
+    the real path of the YAML file, so nothing is written next to the
+    config files and symlinks to the same file share one cache.
+    """
+    ros_home = os.environ.get("ROS_HOME", osp.join(osp.expanduser("~"), ".ros"))
+    key = hashlib.sha1(osp.realpath(file_path).encode()).hexdigest()
+    return osp.join(ros_home, "kxr_controller", "yaml_cache", key + ".json")
+
+
+def load_yaml(file_path, Loader=yaml_safe_loader):
     """Load a YAML file into a Python dict.
 
     Parameters
@@ -61,12 +80,42 @@ def load_yaml(file_path, Loader=yaml.SafeLoader):
     -------
     data : dict
         A dict with the loaded yaml data.
+
+    Notes
+    -----
+    The parsed ``joint_name_to_servo_id`` section is cached as JSON at
+    ``yaml_cache_path(file_path)`` together with the real path, mtime (ns)
+    and size of the YAML file, and is reused only while all three match.
     """
     if not osp.exists(str(file_path)):
         raise OSError(f"{file_path!s} not exists")
-    with open(osp.expanduser(file_path)) as f:
-        data = yaml.load(f, Loader=Loader)
-    data = data["joint_name_to_servo_id"]
+    file_path = osp.realpath(osp.expanduser(str(file_path)))
+    cache_path = yaml_cache_path(file_path)
+    stat = os.stat(file_path)
+    source = [file_path, stat.st_mtime_ns, stat.st_size]
+    data = None
+    if osp.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+            if cache.get("source") == source:
+                data = cache["data"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            data = None
+    if data is None:
+        with open(file_path) as f:
+            data = load_yaml_section(f, "joint_name_to_servo_id", Loader=Loader)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(osp.dirname(cache_path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"source": source, "data": data}, f)
+            # Readers never see a partially written cache.
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError):
+            # Unwritable cache directory or non JSON-serializable values.
+            if osp.exists(tmp_path):
+                os.remove(tmp_path)
     joint_name_to_id = {}
     for name in data:
         if isinstance(data[name], int):
@@ -94,27 +143,28 @@ def make_urdf_file(joint_name_to_id):
         ET.SubElement(joint, "limit", velocity="7.47998", effort="0.656248")
         previous_link_name = link_name
 
-    tmp_urdf_file = tempfile.mktemp(suffix=".urdf")
-    tree = ET.ElementTree(robot)
-    tree.write(tmp_urdf_file, encoding="utf-8", xml_declaration=True)
-    return tmp_urdf_file
+    return ET.tostring(robot, encoding="utf-8", xml_declaration=True)
 
 
 def run_robot_state_publisher(namespace=None):
-    command = f'/opt/ros/{os.environ["ROS_DISTRO"]}/bin/rosrun'
-    command += " robot_state_publisher robot_state_publisher"
+    command = [
+        f'/opt/ros/{os.environ["ROS_DISTRO"]}/bin/rosrun',
+        "robot_state_publisher",
+        "robot_state_publisher",
+    ]
     if namespace is not None:
-        command += f" _tf_prefix:={namespace}"
-    command = shlex.split(command)
+        command.append(f"_tf_prefix:={namespace}")
     process = subprocess.Popen(command)
     return process
 
 
 def run_kxr_controller(namespace=None):
-    command = f'/opt/ros/{os.environ["ROS_DISTRO"]}/bin/rosrun'
-    command += " kxr_controller kxr_controller"
-    command += " __name=:kxr_controller"
-    command = shlex.split(command)
+    command = [
+        f'/opt/ros/{os.environ["ROS_DISTRO"]}/bin/rosrun',
+        "kxr_controller",
+        "kxr_controller",
+        "__name=:kxr_controller",
+    ]
     process = subprocess.Popen(command)
     return process
 
@@ -138,9 +188,10 @@ def set_joint_state_controler():
     )
 
 
-def set_robot_description(urdf_path, param_name="robot_description"):
-    with open(urdf_path) as f:
-        rospy.set_param(param_name, f.read())
+def set_robot_description(urdf, param_name="robot_description"):
+    if isinstance(urdf, bytes):
+        urdf = urdf.decode("utf-8")
+    rospy.set_param(param_name, urdf)
 
 
 class RCB4ROSBridge:
@@ -149,6 +200,11 @@ class RCB4ROSBridge:
         self._update_current_limit = False
 
         self._during_servo_off = False
+        self._prev_velocity_command = None
+        self._servo_on_off_msg = None
+        self._servo_on_off_key = None
+        # Timestamp shared by all messages published in one control tick.
+        self._tick_stamp = None
         # Set up configuration paths and parameters
         self.setup_paths_and_params()
 
@@ -173,33 +229,64 @@ class RCB4ROSBridge:
         self.proc_controller_spawner = None
         self.proc_robot_state_publisher = None
         self.proc_kxr_controller = None
+        # Parameters are static for the lifetime of the node,
+        # so read them once instead of querying the master repeatedly.
+        self.base_namespace = self.get_base_namespace()
+        self.fullbody_controller_namespace = self.base_namespace + "/fullbody_controller"
         servo_config_path = rospy.get_param("~servo_config_path")
         self.joint_name_to_id, self.servo_infos = load_yaml(servo_config_path)
         self.urdf_path = rospy.get_param("~urdf_path", None)
+        self.device = rospy.get_param("~device", None)
         self.use_rcb4 = rospy.get_param("~use_rcb4", False)
         self.control_pressure = rospy.get_param("~control_pressure", False)
         self.read_temperature = rospy.get_param("~read_temperature", False) and not self.use_rcb4
         self.read_current = rospy.get_param("~read_current", False) and not self.use_rcb4
-        self.base_namespace = self.get_base_namespace()
+        self.publish_imu = rospy.get_param("~publish_imu", True) and not self.use_rcb4
+        self.publish_sensor = (
+            rospy.get_param("~publish_sensor", False) and not self.use_rcb4
+        )
+        # Also publish one WrenchStamped topic per sensor channel.
+        self.legacy_sensor_topics = rospy.get_param("~legacy_sensor_topics", True)
+        self.publish_battery_voltage = (
+            rospy.get_param("~publish_battery_voltage", True) and not self.use_rcb4
+        )
+        self.control_loop_rate = rospy.get_param(
+            self.base_namespace + "/control_loop_rate", 20
+        )
+        self.check_board_communication_interval = rospy.get_param(
+            "~check_board_communication_interval", 2
+        )
+        # Send the MREADV requests of one read cycle before reading the
+        # replies. Needs a firmware that queues requests.
+        self.pipeline_memory_read = (
+            rospy.get_param("~pipeline_memory_read", False) and not self.use_rcb4
+        )
+        # SCHED_FIFO priority of the control loop. 0 keeps the default scheduler.
+        self.realtime_priority = rospy.get_param("~realtime_priority", 0)
 
     def setup_urdf_and_model(self):
         robot_model = RobotModel()
         rospy.loginfo(f"[setup_urdf_and_model] Loading URDF File. {self.urdf_path}")
         if self.urdf_path is None:
-            self.urdf_path = make_urdf_file(self.joint_name_to_id)
-            rospy.loginfo("Use temporary URDF")
-        with open(self.urdf_path) as f:
-            with no_mesh_load_mode():
-                robot_model.load_urdf_file(f)
+            urdf = make_urdf_file(self.joint_name_to_id)
+            urdf_file = io.BytesIO(urdf)
+            # skrobot resolves relative mesh paths from the file name.
+            urdf_file.name = ""
+            rospy.loginfo("Use in-memory URDF")
+        else:
+            with open(self.urdf_path, "rb") as f:
+                urdf = f.read()
+            urdf_file = io.BytesIO(urdf)
+            urdf_file.name = self.urdf_path
+        with no_mesh_load_mode():
+            robot_model.load_urdf_file(urdf_file)
         joint_list = [
             j for j in robot_model.joint_list if j.__class__.__name__ != "FixedJoint"
         ]
         joint_names = [j.name for j in joint_list]
         set_robot_description(
-            self.urdf_path, param_name=self.base_namespace + "/robot_description"
+            urdf, param_name=self.base_namespace + "/robot_description"
         )
-        if self.urdf_path is None:
-            os.remove(self.urdf_path)
         return robot_model, joint_names
 
     def setup_ros_parameters(self):
@@ -210,36 +297,35 @@ class RCB4ROSBridge:
     def setup_publishers_and_servers(self):
         """Set up ROS publishers and action servers."""
         self.current_joint_states_pub = rospy.Publisher(
-            self.base_namespace + "/current_joint_states", JointState, queue_size=1
+            self.base_namespace + "/current_joint_states",
+            JointState,
+            queue_size=1,
+            tcp_nodelay=True,
         )
 
         self.servo_states_pub = rospy.Publisher(
-            self.base_namespace + "/servo_states", ServoStateArray, queue_size=1
+            self.base_namespace + "/servo_states",
+            ServoStateArray,
+            queue_size=1,
+            tcp_nodelay=True,
         )
 
         # Publish servo state like joint_trajectory_controller
         # https://wiki.ros.org/joint_trajectory_controller#Published_Topics
+        self._servo_on_off_subscribers = SubscriberCounter()
         self.servo_on_off_pub = rospy.Publisher(
-            self.base_namespace
-            + "/fullbody_controller/servo_on_off_real_interface/state",
+            self.fullbody_controller_namespace + "/servo_on_off_real_interface/state",
             ServoOnOff,
             queue_size=1,
+            tcp_nodelay=True,
+            subscriber_listener=self._servo_on_off_subscribers,
         )
 
         self.cancel_motion_pub = rospy.Publisher(
-            self.base_namespace
-            + "/fullbody_controller/follow_joint_trajectory"
-            + "/cancel",
+            self.fullbody_controller_namespace + "/follow_joint_trajectory/cancel",
             GoalID,
             queue_size=1,
-        )
-
-        self.publish_imu = rospy.get_param("~publish_imu", True) and not self.use_rcb4
-        self.publish_sensor = (
-            rospy.get_param("~publish_sensor", False) and not self.use_rcb4
-        )
-        self.publish_battery_voltage = (
-            rospy.get_param("~publish_battery_voltage", True) and not self.use_rcb4
+            tcp_nodelay=True,
         )
 
         if self.publish_imu:
@@ -247,28 +333,95 @@ class RCB4ROSBridge:
                 "~imu_frame_id",
                 self.base_namespace + "/" + self.robot_model.root_link.name,
             )
+            self._imu_subscribers = SubscriberCounter()
             self.imu_publisher = rospy.Publisher(
-                self.base_namespace + "/imu", sensor_msgs.msg.Imu, queue_size=1
+                self.base_namespace + "/imu",
+                sensor_msgs.msg.Imu,
+                queue_size=1,
+                tcp_nodelay=True,
+                subscriber_listener=self._imu_subscribers,
             )
+            # Messages are serialized in publish(),
+            # so one instance can be reused for every tick.
+            self._imu_msg = sensor_msgs.msg.Imu()
+            self._imu_msg.header.frame_id = self.imu_frame_id
         if self.publish_sensor:
-            self._sensor_publisher_dict = {}
+            # All sensors in one message, one publish per tick.
+            self._sensor_array_subscribers = SubscriberCounter()
+            self.sensor_array_publisher = rospy.Publisher(
+                self.base_namespace + "/kjs/sensors",
+                JointbaseSensorArray,
+                queue_size=1,
+                tcp_nodelay=True,
+                subscriber_listener=self._sensor_array_subscribers,
+            )
+            self._sensor_array_msg = JointbaseSensorArray()
+            self._sensor_id_to_sidx = {}
+            self._sensor_pubs = []
+            # Shared by all per-channel sensor publishers.
+            self._legacy_sensor_subscribers = SubscriberCounter()
+            self.setup_sensor_publishers()
         if self.publish_battery_voltage:
+            self._battery_voltage_subscribers = SubscriberCounter()
             self.battery_voltage_publisher = rospy.Publisher(
                 self.base_namespace + "/battery_voltage",
                 std_msgs.msg.Float32,
                 queue_size=1,
+                tcp_nodelay=True,
+                subscriber_listener=self._battery_voltage_subscribers,
             )
 
+        # Publish from a separate thread so that a slow subscriber
+        # does not delay the serial reads of the control loop.
+        self._publish_queue = queue.Queue(maxsize=8)
+        self._publish_thread = threading.Thread(
+            target=self._publish_worker, daemon=True
+        )
+        self._publish_thread.start()
+
         # Action servers for servo control
         self.setup_action_servers_and_clients()
         self.srv = Server(Config, self.config_callback)
 
+    def _publish_worker(self):
+        while not rospy.is_shutdown():
+            try:
+                func, args = self._publish_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                func(*args)
+            except rospy.ROSException as e:
+                rospy.logwarn(f"Failed to publish: {e}")
+            except Exception as e:
+                # Keep the thread alive, otherwise nothing is published
+                # again while the control loop keeps enqueueing.
+                rospy.logerr_throttle(
+                    1.0, f"[{func.__name__}] Failed to publish: {e!r}"
+                )
+
+    def _enqueue_publish(self, func, *args):
+        """Run func(*args) on the publish thread.
+
+        Like a ``queue_size=1`` publisher, the oldest pending job is dropped
+        when the publish thread falls behind.
+        """
+        while True:
+            try:
+                self._publish_queue.put_nowait((func, args))
+                return
+            except queue.Full:
+                try:
+                    self._publish_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
     def setup_action_servers_and_clients(self):
         """Set up action servers for controlling servos and pressure."""
 
         # Servo on/off action server
         self.servo_on_off_server = actionlib.SimpleActionServer(
-            self.base_namespace + "/fullbody_controller/servo_on_off_real_interface",
+            self.fullbody_controller_namespace + "/servo_on_off_real_interface",
             ServoOnOffAction,
             execute_cb=self.servo_on_off_callback,
             auto_start=False,
@@ -278,14 +431,14 @@ class RCB4ROSBridge:
         self.servo_on_off_server.start()
 
         self.traj_action_client = actionlib.SimpleActionClient(
-            self.base_namespace + "/fullbody_controller/follow_joint_trajectory",
+            self.fullbody_controller_namespace + "/follow_joint_trajectory",
             FollowJointTrajectoryAction,
         )
         self.traj_action_client.wait_for_server()
 
         # Adjust angle vector action server
         self.adjust_angle_vector_server = actionlib.SimpleActionServer(
-            self.base_namespace + "/fullbody_controller/adjust_angle_vector_interface",
+            self.fullbody_controller_namespace + "/adjust_angle_vector_interface",
             AdjustAngleVectorAction,
             execute_cb=self.adjust_angle_vector_callback,
             auto_start=False,
@@ -301,7 +454,7 @@ class RCB4ROSBridge:
     def setup_stretch_and_pressure_control_servers(self):
         """Configure stretch and pressure control action servers if enabled."""
         self.stretch_server = actionlib.SimpleActionServer(
-            self.base_namespace + "/fullbody_controller/stretch_interface",
+            self.fullbody_controller_namespace + "/stretch_interface",
             StretchAction,
             execute_cb=self.stretch_callback,
             auto_start=False,
@@ -310,9 +463,10 @@ class RCB4ROSBridge:
         self.stretch_server.start()
 
         self.stretch_publisher = rospy.Publisher(
-            self.base_namespace + "/fullbody_controller/stretch",
+            self.fullbody_controller_namespace + "/stretch",
             Stretch,
             queue_size=1,
+            tcp_nodelay=True,
             latch=True,
         )
         rospy.sleep(0.1)
@@ -325,7 +479,7 @@ class RCB4ROSBridge:
 
         if self.control_pressure:
             self.pressure_control_server = actionlib.SimpleActionServer(
-                self.base_namespace + "/fullbody_controller/pressure_control_interface",
+                self.fullbody_controller_namespace + "/pressure_control_interface",
                 PressureControlAction,
                 execute_cb=self.pressure_control_callback,
                 auto_start=False,
@@ -334,25 +488,80 @@ class RCB4ROSBridge:
             self.pressure_control_server.start()
 
             self.pressure_control_pub = rospy.Publisher(
-                self.base_namespace
-                + "/fullbody_controller/pressure_control_interface"
-                + "/state",
+                self.fullbody_controller_namespace + "/pressure_control_interface/state",
                 PressureControl,
                 queue_size=1,
+                tcp_nodelay=True,
             )
 
-            rospy.set_param(self.base_namespace + "/air_board_ids", self.air_board_ids)
-            self.pressure_control_state = {}
-            for idx in self.air_board_ids:
-                self.pressure_control_state[f"{idx}"] = {}
-                self.pressure_control_state[f"{idx}"]["start_pressure"] = 0
-                self.pressure_control_state[f"{idx}"]["stop_pressure"] = 0
-                self.pressure_control_state[f"{idx}"]["release"] = True
-            self._pressure_publisher_dict = {}
-            self._avg_pressure_publisher_dict = {}
-            # Record 1 seconds pressure data.
-            hz = rospy.get_param(self.base_namespace + "/control_loop_rate", 20)
-            self.recent_pressures = deque([], maxlen=1 * int(hz))
+            self.pressure_control_thread = None
+            self._pressure_control_stop_event = threading.Event()
+            self._pressure_board_ids = None
+            self._pressure_publishers = []
+            self._avg_pressure_publishers = []
+            self.setup_pressure_board_publishers()
+            # Avoid 'rospy.exceptions.ROSException:
+            # publish() to a closed topic'
+            rospy.sleep(0.1)
+            # Record 1 seconds pressure data in a ring buffer
+            # with a running sum to get the average in O(1).
+            self._pressure_ring = np.zeros(
+                max(1, 1 * int(self.control_loop_rate)), dtype=np.float64
+            )
+            self._pressure_sum = 0.0
+            self._pressure_count = 0
+            self._pressure_head = 0
+
+    def setup_pressure_board_publishers(self):
+        """Build the per air board pressure state and publishers.
+
+        Called again after the interface is reinitialized; nothing is
+        rebuilt unless ``air_board_ids`` changed.
+        """
+        if self.air_board_ids is None:
+            return
+        board_ids = list(self.air_board_ids)
+        if board_ids == self._pressure_board_ids:
+            return
+        if self.pressure_control_thread is not None:
+            # The running loop indexes the arrays replaced below.
+            self._pressure_control_stop_event.set()
+            self.pressure_control_thread.join()
+            self.pressure_control_thread = None
+        rospy.set_param(self.base_namespace + "/air_board_ids", board_ids)
+        # Pressure control state of each air board indexed by board idx.
+        n_board = max(board_ids, default=-1) + 1
+        self._pressure_control_start = np.zeros(n_board, dtype=np.float32)
+        self._pressure_control_stop = np.zeros(n_board, dtype=np.float32)
+        self._pressure_control_release = np.ones(n_board, dtype=bool)
+        for pub in self._pressure_publishers + self._avg_pressure_publishers:
+            pub.unregister()
+        # Parallel lists in _pressure_board_ids order, used every tick.
+        pressure_publishers = []
+        avg_pressure_publishers = []
+        pressure_control_msgs = []
+        for idx in board_ids:
+            pressure_publishers.append(
+                rospy.Publisher(
+                    self.fullbody_controller_namespace + f"/pressure/{idx}",
+                    std_msgs.msg.Float32,
+                    queue_size=1,
+                    tcp_nodelay=True,
+                )
+            )
+            avg_pressure_publishers.append(
+                rospy.Publisher(
+                    self.fullbody_controller_namespace + f"/average_pressure/{idx}",
+                    std_msgs.msg.Float32,
+                    queue_size=1,
+                    tcp_nodelay=True,
+                )
+            )
+            pressure_control_msgs.append(PressureControl(board_idx=idx))
+        self._pressure_publishers = pressure_publishers
+        self._avg_pressure_publishers = avg_pressure_publishers
+        self._pressure_control_msgs = pressure_control_msgs
+        self._pressure_board_ids = board_ids
 
     def setup_interface_and_servo_parameters(self):
         self.interface = self.setup_interface()
@@ -371,23 +580,26 @@ class RCB4ROSBridge:
 
         wheel_servo_sorted_ids = []
         trim_vector_servo_ids = []
-        trim_vector_offset = []
+        indices = []
+        directions = []
+        offsets = []
         for _, info in self.servo_infos.items():
             if isinstance(info, int):
                 continue
             servo_id = info["id"]
-            direction = info.get("direction", 1)
-            offset = info.get("offset", 0)
             if "type" in info and info["type"] == "continuous":
                 wheel_servo_sorted_ids.append(servo_id)
             idx = self.interface.servo_id_to_index(servo_id)
             if idx is None:
                 continue
-            self.interface._joint_to_actuator_matrix[idx, idx] = (
-                direction * self.interface._joint_to_actuator_matrix[idx, idx]
-            )
+            indices.append(idx)
+            directions.append(info.get("direction", 1))
+            offsets.append(info.get("offset", 0))
             trim_vector_servo_ids.append(servo_id)
-            trim_vector_offset.append(direction * offset)
+        indices = np.array(indices, dtype=np.intp)
+        directions = np.array(directions)
+        self.interface._joint_to_actuator_matrix[indices, indices] *= directions
+        trim_vector_offset = (directions * np.array(offsets)).tolist()
         self.interface._actuator_to_joint_matrix = np.linalg.inv(self.interface.joint_to_actuator_matrix)
         if self.interface.__class__.__name__ != "RCB4Interface":
             if len(trim_vector_offset) > 0:
@@ -401,8 +613,10 @@ class RCB4ROSBridge:
                     return log_error_and_close_interface("set trim_vector")
         if self.interface.wheel_servo_sorted_ids is None:
             self.interface.wheel_servo_sorted_ids = []
-        self.interface.wheel_servo_sorted_ids = list(
-            set(self.interface.wheel_servo_sorted_ids + wheel_servo_sorted_ids))
+        self._wheel_servo_id_set = frozenset(
+            self.interface.wheel_servo_sorted_ids + wheel_servo_sorted_ids)
+        self.interface.wheel_servo_sorted_ids = list(self._wheel_servo_id_set)
+        self.build_servo_id_tables()
 
         # set servo ids to rosparam
         servo_ids = self.get_ids(type="servo")
@@ -435,14 +649,19 @@ class RCB4ROSBridge:
         while not rospy.is_shutdown():
             rospy.loginfo("Waiting for the port to become available")
             try:
-                if rospy.get_param("~device", None):
-                    return ARMH7Interface.from_port(rospy.get_param("~device"))
+                if self.device:
+                    interface = ARMH7Interface.from_port(self.device)
+                    if isinstance(interface, ARMH7Interface):
+                        interface.pipeline_memory_read = self.pipeline_memory_read
+                    return interface
                 if self.use_rcb4:
                     interface = RCB4Interface()
                     ret = interface.auto_open()
                     if ret is True:
                         return interface
-                interface = ARMH7Interface()
+                interface = ARMH7Interface(
+                    pipeline_memory_read=self.pipeline_memory_read
+                )
                 ret = interface.auto_open()
                 if ret is True:
                     return interface
@@ -453,7 +672,13 @@ class RCB4ROSBridge:
         sys.exit(1)
 
     def get_base_namespace(self):
-        """Return the clean namespace for the node."""
+        """Return the clean namespace for the node.
+
+        The namespace of a node never changes, so it is computed once and cached.
+        """
+        base_namespace = getattr(self, "base_namespace", None)
+        if base_namespace is not None:
+            return base_namespace
         full_namespace = rospy.get_namespace()
         last_slash_pos = full_namespace.rfind("/")
         return full_namespace[:last_slash_pos] if last_slash_pos != 0 else ""
@@ -514,11 +739,63 @@ class RCB4ROSBridge:
             if jn not in self.joint_name_to_id:
                 continue
             servo_id = self.joint_name_to_id[jn]
-            if servo_id in self.interface.wheel_servo_sorted_ids:
+            if servo_id in self._wheel_servo_id_set:
                 continue
             self.fullbody_jointnames.append(jn)
         set_fullbody_controller(self.fullbody_jointnames)
 
+    def build_servo_id_tables(self):
+        """Build dense lookup tables indexed by servo id.
+
+        ``self._id_to_index[servo_id]`` is the sequentialized index of the
+        servo in the interface (``-1`` if the servo was not found), and
+        ``self._id_is_wheel[servo_id]`` is True for continuous rotation servos.
+        ``self._servo_on_off_joints`` lists the (joint name, servo id)
+        pairs reported by publish_servo_on_off.
+        ``self._joint_state_tables`` holds what publish_joint_states needs:
+        the reused JointState message, the published joint names, their
+        sequentialized servo indices and two conversion buffers.
+        """
+        servo_ids = np.unique(
+            np.array(list(self.joint_name_to_id.values()), dtype=np.intp)
+        )
+        max_id = servo_ids[-1] if len(servo_ids) > 0 else 0
+        self._id_to_index = np.full(max_id + 1, -1, dtype=np.int32)
+        self._id_is_wheel = np.zeros(max_id + 1, dtype=bool)
+        if len(servo_ids) > 0:
+            servo_ids = servo_ids[self.interface.valid_servo_ids(servo_ids)]
+            self._id_to_index[servo_ids] = self.interface.sequentialized_servo_ids(
+                servo_ids
+            )
+        wheel_ids = [
+            servo_id for servo_id in self._wheel_servo_id_set if servo_id <= max_id
+        ]
+        self._id_is_wheel[wheel_ids] = True
+
+        self._servo_on_off_joints = [
+            (name, self.joint_name_to_id[name])
+            for name in self.joint_names
+            if name in self.joint_name_to_id
+        ]
+
+        joint_state_names = []
+        joint_state_indices = []
+        for name in self.joint_names:
+            servo_id = self.joint_name_to_id.get(name)
+            if servo_id is None or self._id_to_index[servo_id] < 0:
+                continue
+            joint_state_names.append(name)
+            joint_state_indices.append(self._id_to_index[servo_id])
+        n = len(joint_state_names)
+        self._joint_state_tables = (
+            # Reused by publish_joint_states, which overwrites the values in place.
+            JointState(name=joint_state_names, position=[0.0] * n, effort=[0.0] * n),
+            joint_state_names,
+            np.array(joint_state_indices, dtype=np.intp),
+            np.zeros(n, dtype=np.float64),
+            np.zeros(n, dtype=np.float64),
+        )
+
     def set_initial_positions(self):
         initial_positions = {}
         init_av = serial_call_with_retry(self.interface.angle_vector, max_retries=10)
@@ -528,12 +805,12 @@ class RCB4ROSBridge:
             if jn not in self.joint_name_to_id:
                 continue
             servo_id = self.joint_name_to_id[jn]
-            if servo_id in self.interface.wheel_servo_sorted_ids:
+            if self._id_is_wheel[servo_id]:
                 continue
-            idx = self.interface.servo_id_to_index(servo_id)
-            if idx is None:
+            idx = self._id_to_index[servo_id]
+            if idx < 0:
                 continue
-            initial_positions[jn] = float(np.deg2rad(init_av[idx]))
+            initial_positions[jn] = float(init_av[idx] * _deg2rad)
         set_initial_position(initial_positions, namespace=self.base_namespace)
         return True
 
@@ -544,29 +821,28 @@ class RCB4ROSBridge:
         )
 
     def _msg_to_angle_vector_and_servo_ids(self, msg, velocity_control=False):
-        used_servo_id = {}
+        servo_on_states = self.interface.servo_on_states_dict
+        positions = np.asarray(msg.position, dtype=np.float64)
+        position_indices = []
         servo_ids = []
-        angle_vector = []
-        for name, angle in zip(msg.name, msg.position):
-            if not self._valid_joint(name):
-                continue
-            idx = self.joint_name_to_id[name]
-            if velocity_control:
-                if idx not in self.interface.wheel_servo_sorted_ids:
-                    continue
-            else:
-                if idx in self.interface.wheel_servo_sorted_ids:
-                    continue
-            # should ignore duplicated index.
-            if idx in used_servo_id:
+        for i, name in enumerate(msg.name[: len(positions)]):
+            servo_id = self.joint_name_to_id.get(name)
+            if servo_id is None or not servo_on_states.get(servo_id, False):
                 continue
-            used_servo_id[idx] = True
-            angle_vector.append(np.rad2deg(angle))
-            servo_ids.append(idx)
-        angle_vector = np.array(angle_vector)
+            position_indices.append(i)
+            servo_ids.append(servo_id)
         servo_ids = np.array(servo_ids, dtype=np.int32)
-        valid_indices = self.interface.valid_servo_ids(servo_ids)
-        return angle_vector[valid_indices], servo_ids[valid_indices]
+        position_indices = np.array(position_indices, dtype=np.intp)
+        valid = (self._id_to_index[servo_ids] >= 0) & (
+            self._id_is_wheel[servo_ids] == velocity_control
+        )
+        servo_ids = servo_ids[valid]
+        position_indices = position_indices[valid]
+        # should ignore duplicated index.
+        _, first_indices = np.unique(servo_ids, return_index=True)
+        first_indices.sort()
+        angle_vector = positions[position_indices[first_indices]] * _rad2deg
+        return angle_vector, servo_ids[first_indices]
 
     def velocity_command_joint_state_callback(self, msg):
         if not self.interface.is_opened() or self._during_servo_off:
@@ -576,11 +852,8 @@ class RCB4ROSBridge:
         )
         if len(av) == 0:
             return
-        if not hasattr(self, "_prev_velocity_command"):
-            self._prev_velocity_command = None
-        if self._prev_velocity_command is not None and np.allclose(
-            self._prev_velocity_command, av
-        ):
+        # Skip resending an unchanged command.
+        if np.array_equal(self._prev_velocity_command, av):
             return
         ret = self.interface.angle_vector(av, servo_ids, velocity=self.wheel_frame_count)
         if ret is None:
@@ -611,16 +884,19 @@ class RCB4ROSBridge:
         self.cancel_motion_pub.publish(GoalID())  # Ensure no active motion
         rospy.sleep(0.1)  # Slight delay for smooth transition
 
-        servo_vector = []
-        servo_ids = []
-        for joint_name, servo_on in zip(goal.joint_names, goal.servo_on_states):
-            if joint_name not in self.joint_name_to_id:
-                continue
-            servo_ids.append(self.joint_name_to_id[joint_name])
-            if servo_on:
-                servo_vector.append(ServoOnOffValues.ON.value)
-            else:
-                servo_vector.append(ServoOnOffValues.OFF.value)
+        n = min(len(goal.joint_names), len(goal.servo_on_states))
+        servo_ids = np.fromiter(
+            (self.joint_name_to_id.get(jn, -1) for jn in goal.joint_names[:n]),
+            dtype=np.int32,
+            count=n,
+        )
+        known = servo_ids >= 0
+        servo_ids = servo_ids[known]
+        servo_vector = np.where(
+            np.asarray(goal.servo_on_states[:n], dtype=bool)[known],
+            ServoOnOffValues.ON.value,
+            ServoOnOffValues.OFF.value,
+        ).astype(np.int32)
 
         self._during_servo_off = True
         ret = serial_call_with_retry(
@@ -644,22 +920,18 @@ class RCB4ROSBridge:
                 text="Failed to call servo on off. "
                 + "Control board is switch off or cable is disconnected?"
             )
-        joint_names = []
-        positions = []
-        for joint_name in self.fullbody_jointnames:
-            angle = 0
-            if joint_name in self.joint_name_to_id:
-                servo_id = self.joint_name_to_id[joint_name]
-                idx = self.interface.servo_id_to_index(servo_id)
-                if idx is not None:
-                    angle = np.deg2rad(av[idx])
-            joint_names.append(joint_name)
-            positions.append(angle)
+        joint_names = list(self.fullbody_jointnames)
+        servo_indices = self._id_to_index[
+            np.array([self.joint_name_to_id[jn] for jn in joint_names], dtype=np.intp)
+        ]
+        positions = np.zeros(len(joint_names), dtype=np.float64)
+        valid = servo_indices >= 0
+        positions[valid] = np.asarray(av)[servo_indices[valid]] * _deg2rad
         # Create JointTrajectoryGoal to set current position on follow_joint_trajectory
         trajectory_goal = FollowJointTrajectoryGoal()
         trajectory_goal.trajectory.joint_names = joint_names
         point = JointTrajectoryPoint()
-        point.positions = positions
+        point.positions = positions.tolist()
         point.time_from_start = rospy.Duration(
             0.5
         )  # Short duration for immediate application
@@ -743,71 +1015,65 @@ class RCB4ROSBridge:
     def publish_pressure(self):
         if not self.interface.is_opened():
             return
-        for idx in self.air_board_ids:
-            key = f"{idx}"
-            if key not in self._pressure_publisher_dict:
-                self._pressure_publisher_dict[key] = rospy.Publisher(
-                    self.base_namespace + "/fullbody_controller/pressure/" + key,
-                    std_msgs.msg.Float32,
-                    queue_size=1,
-                )
-                self._avg_pressure_publisher_dict[key] = rospy.Publisher(
-                    self.base_namespace + "/fullbody_controller/average_pressure/" + key,
-                    std_msgs.msg.Float32,
-                    queue_size=1,
-                )
-                # Avoid 'rospy.exceptions.ROSException:
-                # publish() to a closed topic'
-                rospy.sleep(0.1)
+        for idx, pub, avg_pub in zip(
+            self._pressure_board_ids,
+            self._pressure_publishers,
+            self._avg_pressure_publishers,
+        ):
             pressure = serial_call_with_retry(self.interface.read_pressure_sensor, idx)
             if pressure is None:
                 continue
-            self.recent_pressures.append(pressure)
-            self._pressure_publisher_dict[key].publish(
-                std_msgs.msg.Float32(data=pressure)
-            )
+            self._append_recent_pressure(pressure)
+            pub.publish(std_msgs.msg.Float32(data=pressure))
             # Publish average pressure (noise removed pressure)
-            self._avg_pressure_publisher_dict[key].publish(
-                std_msgs.msg.Float32(data=self.average_pressure)
-            )
+            avg_pub.publish(std_msgs.msg.Float32(data=self.average_pressure))
 
     def publish_pressure_control(self):
-        for idx in list(self.pressure_control_state.keys()):
-            idx = int(idx)
-            msg = PressureControl()
-            msg.board_idx = idx
-            msg.start_pressure = self.pressure_control_state[f"{idx}"]["start_pressure"]
-            msg.stop_pressure = self.pressure_control_state[f"{idx}"]["stop_pressure"]
-            msg.release = self.pressure_control_state[f"{idx}"]["release"]
+        # Messages are serialized in publish(), so they can be reused.
+        for idx, msg in zip(self._pressure_board_ids, self._pressure_control_msgs):
+            msg.start_pressure = float(self._pressure_control_start[idx])
+            msg.stop_pressure = float(self._pressure_control_stop[idx])
+            msg.release = bool(self._pressure_control_release[idx])
             self.pressure_control_pub.publish(msg)
 
     def pressure_control_loop(self, idx, start_pressure, stop_pressure, release):
-        self.pressure_control_state[f"{idx}"]["start_pressure"] = start_pressure
-        self.pressure_control_state[f"{idx}"]["stop_pressure"] = stop_pressure
-        self.pressure_control_state[f"{idx}"]["release"] = release
-        if self.pressure_control_running is False:
+        self._pressure_control_start[idx] = start_pressure
+        self._pressure_control_stop[idx] = stop_pressure
+        self._pressure_control_release[idx] = release
+        stop_event = self._pressure_control_stop_event
+        if stop_event.is_set():
             return
         if release is True:
             self.release_vacuum(idx)
-            self.pressure_control_running = False
             return
         vacuum_on = False
-        while self.pressure_control_running:
+        # Event.wait() returns as soon as the loop is asked to stop
+        # instead of sleeping out the whole period.
+        while not stop_event.wait(0.1) and not rospy.is_shutdown():
             pressure = self.average_pressure
             if pressure is None:
-                rospy.sleep()
+                continue
             if vacuum_on is False and pressure > start_pressure:
                 vacuum_on = self.start_vacuum(idx)
             if vacuum_on and pressure <= stop_pressure:
                 vacuum_on = not self.stop_vacuum(idx)
-            rospy.sleep(0.1)
+
+    def _append_recent_pressure(self, pressure):
+        head = self._pressure_head
+        self._pressure_sum += pressure - self._pressure_ring[head]
+        self._pressure_ring[head] = pressure
+        head = (head + 1) % len(self._pressure_ring)
+        if head == 0:
+            # Resynchronize once per cycle to avoid accumulating rounding error.
+            self._pressure_sum = float(self._pressure_ring.sum())
+        self._pressure_head = head
+        self._pressure_count = min(self._pressure_count + 1, len(self._pressure_ring))
 
     @property
     def average_pressure(self):
-        n = len(self.recent_pressures)
-        if n == 0:
+        if self._pressure_count == 0:
             return None
-        return sum(self.recent_pressures) / n
+        return self._pressure_sum / self._pressure_count
 
     def release_vacuum(self, idx):
         """Connect work to air.
@@ -873,18 +1139,22 @@ class RCB4ROSBridge:
     def pressure_control_callback(self, goal):
         if not self.interface.is_opened():
             return
-        if hasattr(self, 'pressure_control_thread') and self.pressure_control_thread is not None:
-            # Finish existing thread
-            self.pressure_control_running = False
-            # Wait for the finishing process complete
-            while self.pressure_control_thread.is_alive() is True:
-                rospy.sleep(0.1)
+        if goal.board_idx not in self._pressure_board_ids:
+            return self.pressure_control_server.set_aborted(
+                PressureControlResult(),
+                text=f"Unknown air board {goal.board_idx}. "
+                + f"Available boards are {self._pressure_board_ids}.",
+            )
+        if self.pressure_control_thread is not None:
+            # Finish existing thread and wait for it to complete
+            self._pressure_control_stop_event.set()
+            self.pressure_control_thread.join()
         # Set new thread
         idx = goal.board_idx
         start_pressure = goal.start_pressure
         stop_pressure = goal.stop_pressure
         release = goal.release
-        self.pressure_control_running = True
+        self._pressure_control_stop_event.clear()
         self.pressure_control_thread = threading.Thread(
             target=self.pressure_control_loop,
             args=(
@@ -899,13 +1169,12 @@ class RCB4ROSBridge:
         return self.pressure_control_server.set_succeeded(PressureControlResult())
 
     def publish_imu_message(self):
-        if self.publish_imu is False or self.imu_publisher.get_num_connections() == 0:
+        if self.publish_imu is False or self._imu_subscribers.count == 0:
             return
         if not self.interface.is_opened():
             return
-        msg = sensor_msgs.msg.Imu()
-        msg.header.frame_id = self.imu_frame_id
-        msg.header.stamp = rospy.Time.now()
+        msg = self._imu_msg
+        msg.header.stamp = self._tick_stamp
         q_wxyz_acc_gyro = serial_call_with_retry(self.interface.read_imu_data)
         if q_wxyz_acc_gyro is None:
             return
@@ -924,48 +1193,125 @@ class RCB4ROSBridge:
     def publish_sensor_values(self):
         if self.publish_sensor is False:
             return
+        # Skip the serial read when nobody listens to any sensor topic.
+        publish_array = self._sensor_array_subscribers.count > 0
+        if not publish_array and self._legacy_sensor_subscribers.count == 0:
+            return
         if not self.interface.is_opened():
             return
-        stamp = rospy.Time.now()
-        msg = geometry_msgs.msg.WrenchStamped()
-        msg.header.stamp = stamp
-        sensors = serial_call_with_retry(self.interface.all_jointbase_sensors)
+        stamp = self._tick_stamp
+        sensor_arrays = serial_call_with_retry(self.interface.jointbase_sensor_arrays)
+        if sensor_arrays is None:
+            return
+        ids, ps_array, adc_array = sensor_arrays
+        if publish_array:
+            msg = self._sensor_array_msg
+            msg.header.stamp = stamp
+            msg.ids = ids.tolist()
+            msg.proximity = ps_array.ravel().tolist()
+            msg.force = adc_array.ravel().tolist()
+            self.sensor_array_publisher.publish(msg)
+        for sensor_id, ps, adc in zip(
+            ids.tolist(), ps_array.tolist(), adc_array.tolist()
+        ):
+            sidx = self._sensor_id_to_sidx.get(sensor_id)
+            if sidx is None:
+                continue
+            proximity_pubs, force_pubs = self._sensor_pubs[sidx]
+            for (pub, msg), value in zip(proximity_pubs, ps):
+                msg.header.stamp = stamp
+                msg.wrench.force.x = value
+                pub.publish(msg)
+            for (pub, msg), value in zip(force_pubs, adc):
+                msg.header.stamp = stamp
+                msg.wrench.force.x = value
+                pub.publish(msg)
+
+    def setup_sensor_publishers(self):
+        """Advertise the topics of all connected sensors.
+
+        Called at startup and after the interface is reinitialized, so
+        that publish_sensor_values never has to create publishers.
+        """
+        if self.publish_sensor is False or self.legacy_sensor_topics is False:
+            return
+        sensors = serial_call_with_retry(
+            self.interface.all_jointbase_sensors, max_retries=3
+        )
         if sensors is None:
+            rospy.logwarn("Could not read jointbase sensors.")
             return
-        for sensor in sensors:
-            for i in range(4):
-                for typ in ["proximity", "force"]:
-                    key = f"kjs_{sensor.id}_{typ}_{i}"
-                    if typ == "proximity":
-                        msg.wrench.force.x = sensor.ps[i]
-                    elif typ == "force":
-                        msg.wrench.force.x = sensor.adc[i]
-                    if key not in self._sensor_publisher_dict:
-                        self._sensor_publisher_dict[key] = rospy.Publisher(
-                            self.base_namespace + f"/kjs/{sensor.id}/{typ}/{i}",
-                            geometry_msgs.msg.WrenchStamped,
-                            queue_size=1,
-                        )
-                        # Avoid 'rospy.exceptions.ROSException:
-                        # publish() to a closed topic'
-                        rospy.sleep(0.1)
-                    msg.header.frame_id = f"kjs_{sensor.id}_{i}_frame"
-                    self._sensor_publisher_dict[key].publish(msg)
+        new_sensor_ids = [
+            sensor.id
+            for sensor in sensors
+            if sensor.id not in self._sensor_id_to_sidx
+        ]
+        if len(new_sensor_ids) > 0:
+            self.create_sensor_publishers(new_sensor_ids)
+
+    def create_sensor_publishers(self, sensor_ids):
+        """Create the WrenchStamped publishers of each sensor.
+
+        ``self._sensor_id_to_sidx`` maps a sensor id to its index in
+        ``self._sensor_pubs``, whose entries are
+        ``(proximity_pubs, force_pubs)``. Both are lists of
+        ``(publisher, message)`` ordered by channel. The message has its
+        frame_id already set, so publishing only updates the stamp and
+        the value.
+        """
+        for sensor_id in sensor_ids:
+            pubs = {}
+            for typ in ["proximity", "force"]:
+                pubs[typ] = []
+                for i in range(4):
+                    pub = rospy.Publisher(
+                        self.base_namespace + f"/kjs/{sensor_id}/{typ}/{i}",
+                        geometry_msgs.msg.WrenchStamped,
+                        queue_size=1,
+                        tcp_nodelay=True,
+                        subscriber_listener=self._legacy_sensor_subscribers,
+                    )
+                    msg = geometry_msgs.msg.WrenchStamped()
+                    msg.header.frame_id = f"kjs_{sensor_id}_{i}_frame"
+                    pubs[typ].append((pub, msg))
+            self._sensor_id_to_sidx[sensor_id] = len(self._sensor_pubs)
+            self._sensor_pubs.append((pubs["proximity"], pubs["force"]))
+        # Avoid 'rospy.exceptions.ROSException:
+        # publish() to a closed topic'
+        rospy.sleep(0.1)
 
     def publish_battery_voltage_value(self):
         if (
             self.publish_battery_voltage is False
-            or self.battery_voltage_publisher.get_num_connections() == 0
+            or self._battery_voltage_subscribers.count == 0
         ):
             return
         battery_voltage = serial_call_with_retry(self.interface.battery_voltage)
         if battery_voltage is None:
             return
-        self.battery_voltage_publisher.publish(std_msgs.msg.Float32(data=battery_voltage))
+        self._enqueue_publish(
+            self.battery_voltage_publisher.publish,
+            std_msgs.msg.Float32(data=battery_voltage),
+        )
+
+    def _read_angle_vector_and_error(self):
+        if hasattr(self.interface, "read_state_bundle"):
+            # Angle vector and servo error in one exchange.
+            return self.interface.read_state_bundle()
+        return self.interface.angle_vector(), self.interface.servo_error()
 
     def publish_joint_states(self):
-        av = serial_call_with_retry(self.interface.angle_vector)
-        torque_vector = serial_call_with_retry(self.interface.servo_error)
+        # Call the interface directly in the common case and only go
+        # through serial_call_with_retry, which logs and retries, on failure.
+        try:
+            av, torque_vector = self._read_angle_vector_and_error()
+        except serial_errors:
+            av_and_error = serial_call_with_retry(self._read_angle_vector_and_error)
+            if av_and_error is None:
+                return
+            av, torque_vector = av_and_error
+        if av is None or torque_vector is None:
+            return
         if self.read_current:
             currents = serial_call_with_retry(self.interface.read_servo_current)
         else:
@@ -974,60 +1320,81 @@ class RCB4ROSBridge:
             temperatures = serial_call_with_retry(self.interface.read_servo_temperature)
         else:
             temperatures = None
-        if av is None or torque_vector is None:
-            return
-        msg = JointState()
-        msg.header.stamp = rospy.Time.now()
+        # The tables are passed along because
+        # reinitialize_interface may replace them while the job is queued.
+        self._enqueue_publish(
+            self._publish_joint_state_values,
+            self._joint_state_tables,
+            self._tick_stamp,
+            av,
+            torque_vector,
+            currents,
+            temperatures,
+        )
+        return True
+
+    def _publish_joint_state_values(
+        self, tables, stamp, av, torque_vector, currents, temperatures
+    ):
+        msg, names, indices, position_buffer, effort_buffer = tables
+        # torque_vector is the int16 error_angle vector, so gather first and
+        # let np.multiply cast into the float64 buffers.
+        positions = np.multiply(
+            np.asarray(av)[indices], _deg2rad, out=position_buffer
+        ).tolist()
+        efforts = np.multiply(
+            np.asarray(torque_vector)[indices], _deg2rad, out=effort_buffer
+        ).tolist()
+        msg.header.stamp = stamp
+        msg.position[:] = positions
+        msg.effort[:] = efforts
         servos_msg = ServoStateArray()
         servos_msg.header.stamp = msg.header.stamp
-        for name in self.joint_names:
-            if name in self.joint_name_to_id:
-                servo_id = self.joint_name_to_id[name]
-                idx = self.interface.servo_id_to_index(servo_id)
-                if idx is None:
-                    continue
-                position = np.deg2rad(av[idx])
-                effort = np.deg2rad(torque_vector[idx])
-                msg.position.append(position)
-                msg.effort.append(effort)
-                msg.name.append(name)
-                servo_state_msg = ServoState(
-                    header=msg.header,
-                    name=name,
-                    position=position,
-                    error=effort)
-                if temperatures is not None and len(temperatures) > idx:
-                    servo_state_msg.temperature = temperatures[idx]
-                if currents is not None and len(currents) > idx:
-                    servo_state_msg.current = currents[idx]
-                servos_msg.servos.append(servo_state_msg)
+        for name, idx, position, effort in zip(
+            names, indices.tolist(), positions, efforts
+        ):
+            servo_state_msg = ServoState(
+                header=msg.header,
+                name=name,
+                position=position,
+                error=effort)
+            if temperatures is not None and len(temperatures) > idx:
+                servo_state_msg.temperature = temperatures[idx]
+            if currents is not None and len(currents) > idx:
+                servo_state_msg.current = currents[idx]
+            servos_msg.servos.append(servo_state_msg)
         self.current_joint_states_pub.publish(msg)
         self.servo_states_pub.publish(servos_msg)
-        return True
 
     def publish_servo_on_off(self):
-        if self.servo_on_off_pub.get_num_connections() == 0:
+        if self._servo_on_off_subscribers.count == 0:
             return
         if not self.interface.is_opened():
             return
 
-        servo_on_off_msg = ServoOnOff()
-        for jn in self.joint_names:
-            if jn not in self.joint_name_to_id:
-                continue
-            idx = self.joint_name_to_id[jn]
-            if idx not in self.interface.servo_on_states_dict:
-                continue
-            servo_on_off_msg.joint_names.append(jn)
-            servo_state = self.interface.servo_on_states_dict[idx]
-            servo_on_off_msg.servo_on_states.append(servo_state)
-        self.servo_on_off_pub.publish(servo_on_off_msg)
+        # Rebuild the message only when the servo on/off states changed.
+        key = (self.interface, self.interface.servo_on_version)
+        if key != self._servo_on_off_key:
+            servo_on_off_msg = ServoOnOff()
+            servo_on_states_dict = self.interface.servo_on_states_dict
+            for jn, servo_id in self._servo_on_off_joints:
+                servo_state = servo_on_states_dict.get(servo_id)
+                if servo_state is None:
+                    continue
+                servo_on_off_msg.joint_names.append(jn)
+                servo_on_off_msg.servo_on_states.append(servo_state)
+            self._servo_on_off_msg = servo_on_off_msg
+            self._servo_on_off_key = key
+        self.servo_on_off_pub.publish(self._servo_on_off_msg)
 
     def reinitialize_interface(self):
         rospy.loginfo("Reinitialize interface.")
         self.unsubscribe()
         self.interface.close()
         self.setup_interface_and_servo_parameters()
+        self.setup_sensor_publishers()
+        if not self.use_rcb4 and self.control_pressure:
+            self.setup_pressure_board_publishers()
         self.subscribe()
         rospy.loginfo("Successfully reinitialized interface.")
 
@@ -1049,20 +1416,37 @@ class RCB4ROSBridge:
         # Reset counters and timer
         self.publish_joint_states_successes = 0
         self.publish_joint_states_attempts = 0
-        self.last_check_time = rospy.Time.now()
+        self._last_check_ns = time.monotonic_ns()
+
+    def set_realtime_priority(self):
+        if self.realtime_priority <= 0:
+            return
+        try:
+            os.sched_setscheduler(
+                0, os.SCHED_FIFO, os.sched_param(self.realtime_priority)
+            )
+            rospy.loginfo(f"Control loop runs with SCHED_FIFO {self.realtime_priority}")
+        except (AttributeError, OSError) as e:
+            rospy.logwarn(f"Could not set SCHED_FIFO priority: {e}")
 
     def run(self):
-        rate = rospy.Rate(rospy.get_param(self.base_namespace + "/control_loop_rate", 20))
+        self.set_realtime_priority()
+        # Sleep until absolute deadlines on the monotonic clock,
+        # so the loop period does not drift with the time spent in each tick.
+        period_ns = int(1e9 / self.control_loop_rate)
+        next_deadline = time.monotonic_ns() + period_ns
+        # Battery voltage changes slowly, so read it about once per second.
+        battery_voltage_divider = max(1, round(self.control_loop_rate))
+        tick_count = 0
 
         self.publish_joint_states_attempts = 0
         self.publish_joint_states_successes = 0
-        self.last_check_time = rospy.Time.now()
-        check_board_communication_interval = rospy.get_param(
-            "~check_board_communication_interval", 2
-        )
+        self._last_check_ns = time.monotonic_ns()
+        check_interval_ns = int(self.check_board_communication_interval * 1e9)
         self.success_rate_threshold = 0.8  # Minimum success rate required
 
         while not rospy.is_shutdown():
+            self._tick_stamp = rospy.Time.now()
             if self._update_current_limit:
                 ret = serial_call_with_retry(self.interface.send_current_limit,
                                              self.current_limit, max_retries=3)
@@ -1086,20 +1470,28 @@ class RCB4ROSBridge:
                 self.publish_joint_states_successes += 1
 
             # Check success rate periodically
-            current_time = rospy.Time.now()
-            if (
-                current_time - self.last_check_time
-            ).to_sec() >= check_board_communication_interval:
+            if time.monotonic_ns() - self._last_check_ns >= check_interval_ns:
                 self.check_success_rate()
 
             self.publish_servo_on_off()
             self.publish_imu_message()
             self.publish_sensor_values()
-            self.publish_battery_voltage_value()
-            if rospy.get_param("~use_rcb4") is False and self.control_pressure:
+            if tick_count % battery_voltage_divider == 0:
+                self.publish_battery_voltage_value()
+            tick_count += 1
+            if not self.use_rcb4 and self.control_pressure:
                 self.publish_pressure()
                 self.publish_pressure_control()
-            rate.sleep()
+            now = time.monotonic_ns()
+            if now < next_deadline:
+                time.sleep((next_deadline - now) / 1e9)
+                next_deadline += period_ns
+            else:
+                # Overran the period. Skip the missed ticks instead of
+                # running them back to back.
+                missed = (now - next_deadline) // period_ns + 1
+                rospy.logdebug(f"Control loop overran {missed} period(s).")
+                next_deadline += missed * period_ns
 
 
 if __name__ == "__main__":
@@ -1,6 +1,15 @@
 import rospy
 import serial
 
+# Exceptions raised by a failed exchange with the board.
+serial_errors = (
+    serial.SerialException,
+    OSError,
+    ValueError,
+    IndexError,
+    RuntimeError,
+)
+
 
 def serial_call_with_retry(func, *args, max_retries=1, retry_interval=0.1, **kwargs):
     """Wraps a serial communication function with error handling and retry logic.
@@ -33,13 +42,7 @@ def serial_call_with_retry(func, *args, max_retries=1, retry_interval=0.1, **kwa
     while attempts < max_retries:
         try:
             return func(*args, **kwargs)
-        except (
-            serial.SerialException,
-            OSError,
-            ValueError,
-            IndexError,
-            RuntimeError,
-        ) as e:
+        except serial_errors as e:
             rospy.logerr(f"[{func.__name__}] Error: {e}")
             attempts += 1
             rospy.sleep(retry_interval)
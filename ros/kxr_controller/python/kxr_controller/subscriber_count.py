@@ -0,0 +1,30 @@
+import threading
+
+import rospy
+
+
+class SubscriberCounter(rospy.SubscribeListener):
+    """Track the number of subscribers of one or more publishers.
+
+    Pass an instance as ``subscriber_listener`` of ``rospy.Publisher``.
+    ``count`` is a plain int updated from rospy's connection callbacks,
+    so reading it does not take the publisher's connection lock like
+    ``get_num_connections()`` does. When the instance is shared by
+    several publishers, ``count`` is the total over all their topics.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self._topic_counts = {}
+        self._lock = threading.Lock()
+
+    def peer_subscribe(self, topic_name, topic_publish, peer_publish):
+        with self._lock:
+            self._topic_counts[topic_name] = self._topic_counts.get(topic_name, 0) + 1
+            self.count += 1
+
+    def peer_unsubscribe(self, topic_name, num_peers):
+        with self._lock:
+            self.count += num_peers - self._topic_counts.get(topic_name, 0)
+            self._topic_counts[topic_name] = num_peers
@@ -1,10 +1,21 @@
+import os
+import sys
 import time
 import unittest
 
+from elftools.elf.elffile import ELFFile
+from elftools.elf.sections import SymbolTableSection
 import numpy as np
 from numpy import testing
 
 from rcb4.armh7interface import ARMH7Interface
+from rcb4.armh7interface import build_elf_symbol_table
+from rcb4.armh7interface import decode_servo_params64
+from rcb4.armh7interface import servo_eeprom_params64
+from rcb4.asm import four_bit_to_num
+from rcb4.asm import rcb4_checksum
+from rcb4.struct_header import c_vector
+from rcb4.struct_header import ServoStruct
 
 
 class TestARMH7Interface(unittest.TestCase):
@@ -99,3 +110,94 @@ class TestARMH7Interface(unittest.TestCase):
 
     def test_trim_vector(self):
         self.interface.trim_vector()
+
+
+class TestDecodeServoParams64(unittest.TestCase):
+    def test_decode_servo_params64(self):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            params = rng.integers(0, 256, size=64)
+            expected = {
+                name: four_bit_to_num(list(indices), params.tolist())
+                for name, indices in servo_eeprom_params64.items()
+            }
+            decoded = decode_servo_params64(params)
+            self.assertEqual(decoded, expected)
+            self.assertEqual(list(decoded), list(servo_eeprom_params64))
+
+
+class TestBuildElfSymbolTable(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.realpath(sys.executable)
+        with open(self.path, "rb") as f:
+            if f.read(4) != b"\x7fELF":
+                raise unittest.SkipTest(f"{self.path} is not an ELF file.")
+
+    def test_build_elf_symbol_table(self):
+        # Reference: look the names up with a direct pyelftools scan.
+        expected = {}
+        with open(self.path, "rb") as stream:
+            elf = ELFFile(stream)
+            for section in elf.iter_sections():
+                if isinstance(section, SymbolTableSection):
+                    for symbol in section.iter_symbols():
+                        if symbol.name:
+                            expected[symbol.name] = symbol.entry["st_value"]
+        if len(expected) == 0:
+            raise unittest.SkipTest(f"{self.path} has no symbols.")
+        names = sorted(expected)[:: max(1, len(expected) // 20)]
+        self.assertEqual(
+            build_elf_symbol_table(self.path, names),
+            {name: expected[name] for name in names},
+        )
+
+    def test_build_elf_symbol_table_missing_symbol(self):
+        with self.assertRaises(KeyError):
+            build_elf_symbol_table(self.path, ["__rcb4_no_such_symbol__"])
+
+
+class TestWriteCstructSlotV(unittest.TestCase):
+    def setUp(self):
+        self.interface = ARMH7Interface()
+        self.interface._armh7_address = {ServoStruct.__name__: 0x20000000}
+        self.frames = []
+
+        def serial_write(byte_list):
+            self.frames.append(bytes(byte_list))
+            return b""
+
+        self.interface.serial_write = serial_write
+        self.vcnt = c_vector[ServoStruct.__name__]
+
+    def test_write_cstruct_slot_v_frame(self):
+        values = list(range(self.vcnt))
+        self.interface.write_cstruct_slot_v(ServoStruct, "current_limit", values)
+        self.assertEqual(len(self.frames), 1)
+        frame = self.frames[0]
+        offset = ServoStruct.__fields_types__["current_limit"].offset
+        n = 11 + self.vcnt
+        header = bytes([n, 0xFC])
+        header += (0x20000000 + offset).to_bytes(4, "little")
+        header += bytes([self.vcnt, 1])
+        header += ServoStruct.size.to_bytes(2, "little")
+        self.assertEqual(frame[:10], header)
+        self.assertEqual(frame[10 : n - 1], bytes(values))
+        self.assertEqual(frame[n - 1], rcb4_checksum(frame[: n - 1]))
+
+        self.frames.clear()
+        self.interface.write_cstruct_slot_v(
+            ServoStruct, "trim", np.full(self.vcnt, -1.6)
+        )
+        self.assertEqual(
+            self.frames[0][10:-1], np.full(self.vcnt, -2, dtype="<i2").tobytes()
+        )
+
+    def test_write_cstruct_slot_v_invalid_values(self):
+        for values in ([300] * self.vcnt, [-1] * self.vcnt, [np.nan] * self.vcnt):
+            with self.assertRaises(ValueError):
+                self.interface.write_cstruct_slot_v(
+                    ServoStruct, "current_limit", values
+                )
+        with self.assertRaises(ValueError):
+            self.interface.write_cstruct_slot_v(ServoStruct, "trim", [40000] * self.vcnt)
+        self.assertEqual(self.frames, [])
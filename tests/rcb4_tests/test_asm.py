@@ -0,0 +1,22 @@
+import unittest
+
+import numpy as np
+from numpy import testing
+
+from rcb4.asm import four_bit_to_num
+from rcb4.asm import four_bit_to_num_vector
+
+
+class TestFourBitToNumVector(unittest.TestCase):
+    def test_four_bit_to_num_vector(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 256, size=(8, 64))
+        for lst in ([1, 2], [17, 18, 19, 20], [64, 1, 32]):
+            expected = [four_bit_to_num(lst, row) for row in values.tolist()]
+            testing.assert_array_equal(four_bit_to_num_vector(lst, values), expected)
+
+    def test_four_bit_to_num_vector_single_row(self):
+        self.assertEqual(
+            four_bit_to_num_vector([1, 2], [0x1A, 0x2B]),
+            four_bit_to_num([1, 2], [0x1A, 0x2B]),
+        )
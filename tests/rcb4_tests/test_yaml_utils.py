@@ -0,0 +1,46 @@
+from pathlib import Path
+import unittest
+
+import yaml
+
+from rcb4.yaml_utils import load_yaml_section
+
+document = """
+joint_name_to_servo_id:
+  head_neck_y: 32
+  wheel:
+    id: 34
+    type: continuous
+    direction: -1
+other_section: &anchor
+  values: [1, 2.5, "three", null, true]
+aliased: *anchor
+"""
+
+
+class TestLoadYamlSection(unittest.TestCase):
+    def test_load_yaml_section(self):
+        expected = yaml.safe_load(document)
+        for key in expected:
+            self.assertEqual(load_yaml_section(document, key), expected[key])
+
+    def test_load_yaml_section_servo_configs(self):
+        config_dir = (
+            Path(__file__).resolve().parents[2] / "ros" / "kxr_models" / "config"
+        )
+        paths = sorted(config_dir.glob("*servo_config.yaml"))
+        if len(paths) == 0:
+            raise unittest.SkipTest(f"No servo config found in {config_dir}.")
+        for path in paths:
+            with open(path) as f:
+                expected = yaml.safe_load(f)["joint_name_to_servo_id"]
+            with open(path) as f:
+                self.assertEqual(
+                    load_yaml_section(f, "joint_name_to_servo_id"), expected
+                )
+
+    def test_load_yaml_section_missing_key(self):
+        with self.assertRaises(KeyError):
+            load_yaml_section(document, "missing")
+        with self.assertRaises(KeyError):
+            load_yaml_section("- not\n- a mapping\n", "missing")